@@ -40,9 +40,73 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 7 * 24 * 60  # 7天
+    AUTH_TOKEN_MODE: str = "jwt"  # 访问令牌形式: jwt 或 session（不透明的服务端会话ID）
+    JWT_BACKEND: str = "jose"  # JWT实现: jose (python-jose) 或 pyjwt (PyJWT)
+    JWT_PRIVATE_KEY: Optional[str] = None  # 非对称算法的签名私钥（PEM内容或文件路径）
+    JWT_PUBLIC_KEY: Optional[str] = None  # 非对称算法的验签公钥（PEM内容或文件路径）
+
+    # 认证主体缓存配置
+    PRINCIPAL_CACHE_SIZE: int = 1024  # 最大缓存条目数
+    PRINCIPAL_CACHE_TTL: int = 300  # 条目最长存活时间（秒），不会超过令牌的exp
+
+    # 用户列表总数与分面计数缓存配置
+    USER_COUNT_CACHE_SIZE: int = 256  # 最大缓存的筛选条件数
+    USER_COUNT_CACHE_TTL: int = 30  # 条目最长存活时间（秒），本进程写入用户时立即失效；计数在主库执行，不受只读副本同步延迟影响
+
+    # 令牌权限声明配置
+    PERMISSION_VERSION_CACHE_TTL: int = 5  # 全局权限版本号的缓存时间（秒）
+
+    # 服务端会话配置（AUTH_TOKEN_MODE=session 时生效）
+    SESSION_IDLE_TIMEOUT_MINUTES: int = 30  # 空闲超时（分钟）
+    SESSION_PERSIST: bool = False  # 是否写入数据库，重启后会话仍然有效
+    SESSION_TOUCH_INTERVAL: int = 60  # 持久化时最近访问时间的批量写入间隔（秒）
+
+    # 令牌吊销配置
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000  # 布隆过滤器预期容量，超出后清理时扩容
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.01  # 布隆过滤器误报率
+    TOKEN_REVOCATION_SYNC_INTERVAL: int = 5  # 从数据库同步其他进程吊销记录的间隔（秒）
+    TOKEN_REVOCATION_PURGE_INTERVAL: int = 3600  # 清理已过期吊销记录的间隔（秒）
+
+    # 认证接口限流配置（令牌桶，超出后返回429）
+    AUTH_THROTTLE_IP_BURST: int = 20  # 单个IP的突发尝试次数
+    AUTH_THROTTLE_IP_PER_MINUTE: float = 10  # 单个IP每分钟恢复的尝试次数
+    AUTH_THROTTLE_EMAIL_BURST: int = 5  # 单个邮箱的突发尝试次数
+    AUTH_THROTTLE_EMAIL_PER_MINUTE: float = 3  # 单个邮箱每分钟恢复的尝试次数
+    AUTH_THROTTLE_MAX_KEYS: int = 100000  # 每类计数器的最大条目数，超出时淘汰最久未用的
+    TRUSTED_PROXIES: List[str] = []  # 可信反向代理的IP或网段，只有来自这些地址的请求才采用 X-Forwarded-For / X-Real-IP
+
+    # 密码哈希配置
+    PASSWORD_HASH_MAX_CONCURRENCY: int = os.cpu_count() or 2  # 同时执行的bcrypt运算数
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # 最大排队数，超出时返回503
+    PASSWORD_HASH_RETRY_AFTER: int = 1  # 503响应的Retry-After（秒）
+    PASSWORD_HASH_ROUNDS: Optional[int] = None  # 固定bcrypt轮数，为空时启动时按本机校准
+    PASSWORD_HASH_TARGET_MS: int = 250  # 校准的目标单次哈希耗时（毫秒）
+    PASSWORD_HASH_MIN_ROUNDS: int = 10  # 校准下限
+    PASSWORD_HASH_MAX_ROUNDS: int = 14  # 校准上限
 
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./data/app.db"
+    ASYNC_DATABASE_URL: Optional[str] = None  # 异步引擎URL，为空时由 DATABASE_URL 推导（sqlite 使用 aiosqlite）
+    READ_DATABASE_URL: Optional[str] = None  # 只读副本URL，配置后用户列表/详情、角色列表的查询走副本
+    ASYNC_READ_DATABASE_URL: Optional[str] = None  # 只读副本的异步引擎URL，为空时由 READ_DATABASE_URL 推导
+    READ_REPLICA_SYNC_INTERVAL: float = 2.0  # 主库与副本均为SQLite文件时，后台复制主库到副本的间隔（秒），0 表示不复制
+
+    # 数据库连接池配置（非SQLite数据库与 SQLite performance 配置生效，同步与异步引擎各一个连接池）
+    DB_POOL_SIZE: int = 5  # 常驻连接数
+    DB_MAX_OVERFLOW: int = 10  # 超出常驻连接数后允许临时创建的连接数
+    DB_POOL_TIMEOUT: float = 30  # 等待空闲连接的超时时间（秒）
+    DB_POOL_RECYCLE: int = 1800  # 连接最长复用时间（秒），-1 表示不回收
+    DB_POOL_PRE_PING: bool = True  # 取用连接前检测连接是否可用
+
+    # SQL语句统计配置（每个请求的语句数与耗时写入 X-DB-Queries / Server-Timing 响应头）
+    SQL_QUERY_WARN_THRESHOLD: int = 20  # 单个请求的语句数超过该值时记录警告，0 表示不检查
+    SQL_STRICT_LAZY_LOAD: bool = False  # 严格模式：关系属性的延迟加载直接抛出异常（用于测试中发现N+1查询）
+
+    # SQLite 配置
+    SQLITE_PROFILE: str = "default"  # default: 单连接共享；performance: WAL + 每线程独立连接
+    SQLITE_BUSY_TIMEOUT: int = 5000  # 等待写锁的时间（毫秒）
+    SQLITE_CACHE_SIZE: int = -65536  # 页缓存大小，负数表示KB（默认64MB）
+    SQLITE_MMAP_SIZE: int = 268435456  # 内存映射大小（字节，默认256MB）
 
     # 日志配置
     LOG_LEVEL: str = "INFO"
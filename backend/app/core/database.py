@@ -1,28 +1,186 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
-from typing import Generator
+from typing import AsyncGenerator, Generator, List, Optional
 import os
 
 from .config import settings
+from .db_pool import attach_pool_stats, get_pool_options, get_pool_status
+from . import query_stats  # noqa: F401  注册SQL语句统计与严格延迟加载的事件监听，使用数据库会话的代码均生效
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# SQLite 性能配置
+SQLITE_PROFILE_DEFAULT = "default"
+SQLITE_PROFILE_PERFORMANCE = "performance"
+
+# 同步驱动对应的异步驱动
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+def is_sqlite_url(database_url: str) -> bool:
+    """是否为SQLite数据库URL"""
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+def get_sqlite_pragmas() -> List[str]:
+    """
+    performance 配置在每个新连接上执行的 PRAGMA
+
+    WAL 模式下读不阻塞写、写不阻塞读；synchronous=NORMAL 在 WAL 下仍能保证一致性，
+    只是断电时可能丢失最近提交的事务。busy_timeout 最先设置，使切换 WAL 时也能等待锁。
+    """
+    return [
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT}",
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """连接建立时执行 PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in get_sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def create_database_engine(database_url: str, sqlite_profile: Optional[str] = None) -> Engine:
+    """
+    创建同步数据库引擎
+
+    非SQLite数据库按 DB_POOL_* 配置连接池。SQLite 的 default 配置沿用单个共享连接（StaticPool）；
+    performance 配置使用连接池，每个线程取用独立连接，并在连接时启用WAL等 PRAGMA。
+    """
+    if not is_sqlite_url(database_url):
+        engine = create_engine(database_url, echo=False, **get_pool_options())
+        attach_pool_stats(engine.pool)
+        return engine
+
+    profile = sqlite_profile or settings.SQLITE_PROFILE
+    if profile == SQLITE_PROFILE_PERFORMANCE:
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},  # 连接在线程间归还复用，但同一时刻只属于一个线程
+            echo=False,
+            **get_pool_options()
+        )
+        attach_pool_stats(engine.pool)
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+        return engine
+
+    return create_engine(
+        database_url,
+        connect_args={
+            "check_same_thread": False,  # SQLite特有配置
+        },
+        poolclass=StaticPool,  # SQLite使用静态连接池
+        echo=False  # 关闭SQL语句日志输出
+    )
+
+def get_async_database_url(database_url: str) -> str:
+    """将同步数据库URL转换为异步驱动URL"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"没有为 {backend} 配置异步驱动，请设置 ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def create_async_database_engine(database_url: str, sqlite_profile: Optional[str] = None) -> AsyncEngine:
+    """
+    创建异步数据库引擎
+
+    连接池配置与同步引擎一致；SQLite 的 default 配置沿用驱动默认的连接池，
+    performance 配置同样在连接时执行 PRAGMA。
+    """
+    if not is_sqlite_url(database_url):
+        async_engine = create_async_engine(database_url, echo=False, **get_pool_options(async_engine=True))
+        attach_pool_stats(async_engine.sync_engine.pool)
+        return async_engine
+
+    if (sqlite_profile or settings.SQLITE_PROFILE) == SQLITE_PROFILE_PERFORMANCE:
+        async_engine = create_async_engine(database_url, echo=False, **get_pool_options(async_engine=True))
+        attach_pool_stats(async_engine.sync_engine.pool)
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        return async_engine
+
+    return create_async_engine(database_url, echo=False)
+
 # 创建数据库引擎
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={
-        "check_same_thread": False,  # SQLite特有配置
-    } if settings.DATABASE_URL.startswith("sqlite") else {},
-    poolclass=StaticPool if settings.DATABASE_URL.startswith("sqlite") else None,  # SQLite使用静态连接池
-    echo=False  # 关闭SQL语句日志输出
-)
+engine = create_database_engine(settings.DATABASE_URL)
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 创建异步数据库引擎（与同步引擎指向同一数据库）
+async_engine = create_async_database_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+)
+
+# 创建异步会话工厂（提交后不过期属性，避免隐式的延迟加载）
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# 只读副本的异步引擎（未配置 READ_DATABASE_URL 时为 None，读取仍走主库）
+read_async_engine: Optional[AsyncEngine] = None
+if settings.READ_DATABASE_URL:
+    read_async_engine = create_async_database_engine(
+        settings.ASYNC_READ_DATABASE_URL or get_async_database_url(settings.READ_DATABASE_URL)
+    )
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+
+    SELECT 走只读副本，flush 与 INSERT/UPDATE/DELETE 语句走主库。
+    会话一旦写入主库，其后的读取也固定走主库，保证同一请求内读到自己的写入。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        # 单条语句可通过 bind_arguments={"bind": ...} 指定连接
+        if bind is not None:
+            return bind
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["use_primary"] = True
+        if read_async_engine is None or self.info.get("use_primary"):
+            return async_engine.sync_engine
+        return read_async_engine.sync_engine
+
+def get_primary_bind() -> Engine:
+    """
+    主库的同步引擎
+
+    需要读到最新数据的单条查询（如会被缓存的计数）可通过
+    bind_arguments={"bind": get_primary_bind()} 在读写分离会话中改走主库。
+    """
+    return async_engine.sync_engine
+
+# 读写分离的异步会话工厂
+AsyncReadSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+def get_pool_statistics() -> dict:
+    """同步与异步引擎的连接池状态"""
+    statistics = {
+        "sync": get_pool_status(engine.pool),
+        "async": get_pool_status(async_engine.sync_engine.pool)
+    }
+    if read_async_engine is not None:
+        statistics["read_async"] = get_pool_status(read_async_engine.sync_engine.pool)
+    return statistics
+
 # 创建基础模型类
 Base = declarative_base()
 
@@ -38,6 +196,53 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取异步数据库会话"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"数据库会话错误: {e}")
+            await db.rollback()
+            raise
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取读写分离的异步数据库会话，用于读多写少的查询接口"""
+    async with AsyncReadSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"数据库会话错误: {e}")
+            await db.rollback()
+            raise
+
+def upgrade_schema(bind: Engine) -> None:
+    """
+    为已有数据库补充模型中新增的列和索引
+
+    create_all 只创建缺失的表，不会修改已存在的表。这里只补充可为空且无服务器默认值的列，
+    其他结构变化仍需手动迁移。
+    """
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                if not column.nullable or column.server_default is not None:
+                    logger.warning(f"无法自动添加列 {table.name}.{column.name}，请手动迁移")
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                logger.info(f"已添加列: {table.name}.{column.name}")
+
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
 def init_db():
     """初始化数据库"""
     try:
@@ -45,12 +250,17 @@ def init_db():
         os.makedirs(os.path.dirname(settings.DATABASE_URL.replace("sqlite:///", "")), exist_ok=True)
 
         # 首先导入所有模型以确保它们被正确注册
-        from ..models import User, Role, Permission, UserRole, RolePermission, OperationLog
+        from ..models import User, Role, Permission, UserRole, RolePermission, OperationLog, SystemSetting, RevokedToken, UserSession, UserTag
         
         # 创建所有表
         Base.metadata.create_all(bind=engine)
+        upgrade_schema(engine)
         logger.info("数据库表创建成功")
 
+        # 用户关键词搜索的全文索引（SQLite FTS5）
+        from .user_search import ensure_user_search_index
+        ensure_user_search_index(engine)
+
         # 初始化默认数据
         db = SessionLocal()
         try:
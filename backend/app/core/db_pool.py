@@ -0,0 +1,106 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from .config import settings
+
+class PoolStats:
+    """连接池取用统计：取用次数、等待耗时与超时次数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        """记录一次取用连接的等待耗时"""
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+
+    def record_timeout(self) -> None:
+        """记录一次等待连接超时"""
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """统计快照（耗时单位为毫秒）"""
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3)
+            }
+
+class _InstrumentedPoolMixin:
+    """
+    记录取用等待耗时与超时的连接池
+
+    _do_get 在连接池空闲连接不足时阻塞等待，统计其耗时即为取用连接的等待时间。
+    引擎 dispose 时连接池会被重建，统计对象随之转移到新连接池。
+    """
+
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.record_timeout()
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """带统计的同步连接池"""
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """带统计的异步连接池"""
+
+def get_pool_options(async_engine: bool = False) -> Dict[str, Any]:
+    """根据配置生成 create_engine 的连接池参数"""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if async_engine else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+
+def attach_pool_stats(pool: Pool) -> None:
+    """为带统计的连接池挂载统计对象"""
+    if isinstance(pool, _InstrumentedPoolMixin) and pool.stats is None:
+        pool.stats = PoolStats()
+
+def get_pool_status(pool: Pool) -> Dict[str, Any]:
+    """连接池当前状态：容量、已签出、溢出连接数及取用统计"""
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),  # 未用满时 SQLAlchemy 返回负数
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout()
+        })
+    if isinstance(pool, _InstrumentedPoolMixin) and pool.stats is not None:
+        status.update(pool.stats.snapshot())
+    return status
@@ -0,0 +1,158 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from .config import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 密码加密上下文（bcrypt轮数由 apply_hashing_policy 在启动时确定）
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def calibrate_bcrypt_rounds(target_ms: int, min_rounds: int, max_rounds: int, samples: int = 3) -> int:
+    """
+    测量本机bcrypt耗时，选出不超过目标延迟的最大轮数
+
+    在最小轮数下取若干次耗时的中位数，bcrypt每增加一轮耗时翻倍，
+    据此推算各轮数的耗时。结果限制在 [min_rounds, max_rounds] 之间。
+    """
+    probe = CryptContext(schemes=["bcrypt"], bcrypt__rounds=min_rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        probe.hash("calibration-probe")
+        timings.append((time.perf_counter() - start) * 1000)
+    base_ms = statistics.median(timings)
+
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+
+    logger.info(
+        f"bcrypt校准: {min_rounds}轮耗时 {base_ms:.1f}ms, 目标 {target_ms}ms, "
+        f"选定 {rounds}轮 (预计 {base_ms * 2 ** (rounds - min_rounds):.1f}ms)"
+    )
+    return rounds
+
+def apply_hashing_policy() -> int:
+    """
+    确定并应用bcrypt轮数策略
+
+    轮数优先取 PASSWORD_HASH_ROUNDS，否则按本机耗时校准。
+    最小与最大期望轮数都设为该值，轮数不同的已有哈希会在登录成功时重新生成。
+    """
+    rounds = settings.PASSWORD_HASH_ROUNDS
+    if rounds is None:
+        rounds = calibrate_bcrypt_rounds(
+            settings.PASSWORD_HASH_TARGET_MS,
+            settings.PASSWORD_HASH_MIN_ROUNDS,
+            settings.PASSWORD_HASH_MAX_ROUNDS
+        )
+
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+    return rounds
+
+class _HashTask:
+    """单个哈希任务的状态，保证排队计数只被扣减一次"""
+    __slots__ = ("claimed",)
+
+    def __init__(self):
+        self.claimed = False
+
+class PasswordHashingService:
+    """
+    异步密码哈希服务
+
+    bcrypt 运算放到有界线程池中执行（bcrypt 在计算期间释放 GIL），
+    避免阻塞事件循环。执行中与排队中的任务总数超过上限时直接返回 503。
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, retry_after: int = 1):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queued = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """在哈希线程池中执行函数"""
+        task = _HashTask()
+        with self._lock:
+            if self._in_flight + self._queued >= self.max_concurrency + self.max_queue:
+                self._rejected += 1
+                logger.warning(
+                    f"密码哈希队列已满: 执行中 {self._in_flight}, 排队 {self._queued}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="服务繁忙，请稍后重试",
+                    headers={"Retry-After": str(self.retry_after)}
+                )
+            self._queued += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self._execute, task, func, args)
+        finally:
+            # 任务在开始执行前被取消时，由这里归还排队名额
+            with self._lock:
+                if not task.claimed:
+                    task.claimed = True
+                    self._queued -= 1
+
+    def _execute(self, task: _HashTask, func: Callable[..., Any], args: tuple) -> Any:
+        """工作线程入口"""
+        with self._lock:
+            if task.claimed:
+                return None
+            task.claimed = True
+            self._queued -= 1
+            self._in_flight += 1
+
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+
+    def metrics(self) -> Dict[str, int]:
+        """获取哈希服务指标"""
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue
+            }
+
+    def shutdown(self) -> None:
+        """关闭线程池"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# 全局密码哈希服务实例
+password_hasher = PasswordHashingService(
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER
+)
@@ -0,0 +1,154 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Type
+
+from .config import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class TokenDecodeError(Exception):
+    """令牌签名、格式或有效期校验失败"""
+    pass
+
+def _read_key(value: Optional[str]) -> Optional[str]:
+    """密钥可以直接是PEM内容，也可以是PEM文件路径"""
+    if not value or value.lstrip().startswith("-----BEGIN"):
+        return value
+    with open(value, "r", encoding="utf-8") as key_file:
+        return key_file.read()
+
+class JWTBackend(ABC):
+    """
+    JWT 编解码后端
+
+    签名和验签所用的密钥对象在构造时准备好，之后每次编解码不再重复解析密钥。
+    HS* 算法使用 SECRET_KEY，RS*/ES*/PS* 等非对称算法使用私钥签名、公钥验签。
+    """
+
+    name = ""
+
+    def __init__(self, algorithm: str, secret_key: str, private_key: Optional[str] = None, public_key: Optional[str] = None):
+        self.algorithm = algorithm
+        if algorithm.startswith("HS"):
+            signing_key = verifying_key = secret_key
+        else:
+            signing_key = _read_key(private_key)
+            verifying_key = _read_key(public_key)
+            if not signing_key or not verifying_key:
+                raise ValueError(f"算法 {algorithm} 需要配置 JWT_PRIVATE_KEY 和 JWT_PUBLIC_KEY")
+
+        self._signing_key = self._prepare_key(signing_key)
+        self._verifying_key = self._prepare_key(verifying_key)
+
+    @abstractmethod
+    def encode(self, claims: Dict[str, Any]) -> str:
+        """签发令牌"""
+
+    @abstractmethod
+    def decode(self, token: str) -> Dict[str, Any]:
+        """校验并解码令牌，失败时抛出 TokenDecodeError"""
+
+    def _prepare_key(self, key: str) -> Any:
+        """将密钥转换为库内部的密钥对象"""
+        return key
+
+class JoseBackend(JWTBackend):
+    """python-jose 实现"""
+
+    name = "jose"
+
+    def __init__(self, *args, **kwargs):
+        from jose import JWTError, jwk, jwt
+        self._jwt = jwt
+        self._jwk = jwk
+        self._error = JWTError
+        super().__init__(*args, **kwargs)
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        return self._jwt.encode(claims, self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, self._verifying_key, algorithms=[self.algorithm])
+        except self._error as e:
+            raise TokenDecodeError(str(e)) from e
+
+    def _prepare_key(self, key: str) -> Any:
+        return self._jwk.construct(key, self.algorithm)
+
+class PyJWTBackend(JWTBackend):
+    """PyJWT 实现（可选依赖，选用时需安装 PyJWT，非对称算法还需 cryptography）"""
+
+    name = "pyjwt"
+
+    def __init__(self, *args, **kwargs):
+        try:
+            import jwt
+        except ImportError as e:
+            raise ImportError("JWT_BACKEND=pyjwt 需要安装 PyJWT: pip install PyJWT") from e
+        self._jwt = jwt
+        super().__init__(*args, **kwargs)
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        return self._jwt.encode(claims, self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, self._verifying_key, algorithms=[self.algorithm])
+        except self._jwt.PyJWTError as e:
+            raise TokenDecodeError(str(e)) from e
+
+    def _prepare_key(self, key: str) -> Any:
+        algorithm = self._jwt.get_algorithm_by_name(self.algorithm)
+        return algorithm.prepare_key(key)
+
+# 可选的JWT后端，键为 JWT_BACKEND 配置值
+JWT_BACKENDS: Dict[str, Type[JWTBackend]] = {
+    JoseBackend.name: JoseBackend,
+    PyJWTBackend.name: PyJWTBackend,
+}
+
+def create_jwt_backend(
+    name: str,
+    algorithm: str,
+    secret_key: str,
+    private_key: Optional[str] = None,
+    public_key: Optional[str] = None
+) -> JWTBackend:
+    """按名称创建JWT后端"""
+    backend_class = JWT_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"未知的JWT后端: {name}，可选: {', '.join(JWT_BACKENDS)}")
+    return backend_class(algorithm, secret_key, private_key, public_key)
+
+_backend: Optional[JWTBackend] = None
+
+def configure_jwt_backend(
+    name: Optional[str] = None,
+    algorithm: Optional[str] = None,
+    secret_key: Optional[str] = None,
+    private_key: Optional[str] = None,
+    public_key: Optional[str] = None
+) -> JWTBackend:
+    """
+    设置全局JWT后端，未提供的参数取自 Settings
+
+    Returns:
+        新的JWT后端
+    """
+    global _backend
+    _backend = create_jwt_backend(
+        name or settings.JWT_BACKEND,
+        algorithm or settings.ALGORITHM,
+        secret_key or settings.SECRET_KEY,
+        private_key or settings.JWT_PRIVATE_KEY,
+        public_key or settings.JWT_PUBLIC_KEY
+    )
+    logger.info(f"JWT后端: {_backend.name}, 算法: {_backend.algorithm}")
+    return _backend
+
+def get_jwt_backend() -> JWTBackend:
+    """获取全局JWT后端（首次调用时按 Settings 创建）"""
+    if _backend is None:
+        return configure_jwt_backend()
+    return _backend
@@ -0,0 +1,156 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .permission_matrix import permission_matrix
+from ..models.system_setting import SystemSetting
+from ..utils.cache import cache
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 令牌中权限声明的编码格式版本
+CLAIMS_FORMAT_VERSION = 1
+
+# 全局权限版本号在 system_settings 表中的键
+PERMISSION_VERSION_KEY = "permission_version"
+PERMISSION_VERSION_CACHE_KEY = "permission_version"
+
+class TokenClaims:
+    """从访问令牌中解出的授权信息"""
+
+    def __init__(self, version: int, roles: List[str], permissions: Set[str], is_superuser: bool):
+        self.version = version
+        self.roles = roles
+        self.permissions = permissions
+        self.is_superuser = is_superuser
+        self._role_ids: Optional[List[int]] = None
+
+    @property
+    def role_ids(self) -> List[int]:
+        """角色在权限矩阵中的ID"""
+        if self._role_ids is None:
+            self._role_ids = permission_matrix.role_ids_for(self.roles)
+        return self._role_ids
+
+    def grants_any(self, required_permissions: Iterable[str]) -> bool:
+        """令牌角色是否授予所需权限中的任意一个（含通配授权）"""
+        return permission_matrix.roles_grant_any(self.role_ids, required_permissions)
+
+    def __repr__(self):
+        return f"<TokenClaims(version={self.version}, roles={self.roles}, permissions={len(self.permissions)})>"
+
+def get_permission_version(db: Optional[Session] = None) -> int:
+    """
+    获取当前全局权限版本号（短时缓存，避免每次请求查询数据库）
+
+    权限矩阵早于该版本时（其他进程修改了角色权限）随即重新加载，
+    因此之后按矩阵计算的角色和权限与返回的版本号一致。
+
+    Args:
+        db: 数据库会话，异步请求中传入异步会话 run_sync 提供的会话；为空时使用独立会话
+    """
+    version = cache.get(PERMISSION_VERSION_CACHE_KEY)
+    if version is not None and not permission_matrix.is_stale(version):
+        return version
+
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        if version is None:
+            version = _read_permission_version(db)
+            cache.set(PERMISSION_VERSION_CACHE_KEY, version, ttl=settings.PERMISSION_VERSION_CACHE_TTL)
+        if permission_matrix.is_stale(version):
+            logger.info(f"权限版本已更新为 {version}，重新加载权限矩阵")
+            permission_matrix.load(db, version)
+    finally:
+        if own_session:
+            db.close()
+
+    return version
+
+def _read_permission_version(db: Session) -> int:
+    setting = db.query(SystemSetting).filter(SystemSetting.key == PERMISSION_VERSION_KEY).first()
+    return int(setting.value) if setting and setting.value else 0
+
+def bump_permission_version(db: Session) -> int:
+    """递增全局权限版本号，使已签发令牌中的权限声明失效"""
+    setting = db.query(SystemSetting).filter(SystemSetting.key == PERMISSION_VERSION_KEY).first()
+    if setting is None:
+        setting = SystemSetting(key=PERMISSION_VERSION_KEY, value="0")
+        db.add(setting)
+
+    version = int(setting.value or 0) + 1
+    setting.value = str(version)
+    db.commit()
+
+    # 调用方已增量更新本进程的矩阵；矩阵原本就是最新版本时无需重新加载
+    if permission_matrix.version == version - 1:
+        permission_matrix.mark_version(version)
+
+    cache.set(PERMISSION_VERSION_CACHE_KEY, version, ttl=settings.PERMISSION_VERSION_CACHE_TTL)
+    logger.info(f"全局权限版本号已更新: {version}")
+    return version
+
+def encode_permission_claims(
+    roles: Iterable[str],
+    permissions: Iterable[str],
+    is_superuser: bool = False,
+    version: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    将角色和权限编码为紧凑的令牌声明
+
+    权限按资源分组，例如 users:view、users:edit、roles:view 编码为
+    "users:view,edit|roles:view"。version 为计算权限时的全局权限版本号，为空时现取。
+    """
+    grouped: Dict[str, List[str]] = {}
+    ungrouped: List[str] = []
+    for name in sorted(set(permissions)):
+        resource, separator, action = name.partition(":")
+        if separator:
+            grouped.setdefault(resource, []).append(action)
+        else:
+            ungrouped.append(name)
+
+    parts = [f"{resource}:{','.join(actions)}" for resource, actions in grouped.items()]
+    parts.extend(ungrouped)
+
+    return {
+        "v": CLAIMS_FORMAT_VERSION,
+        "pv": get_permission_version() if version is None else version,
+        "su": 1 if is_superuser else 0,
+        "r": list(roles),
+        "p": "|".join(parts)
+    }
+
+def decode_permission_claims(claims: Optional[Dict[str, Any]]) -> Optional[TokenClaims]:
+    """解码令牌中的权限声明，格式不识别时返回 None"""
+    if not isinstance(claims, dict) or claims.get("v") != CLAIMS_FORMAT_VERSION:
+        return None
+
+    try:
+        permissions: Set[str] = set()
+        for part in filter(None, claims.get("p", "").split("|")):
+            resource, separator, actions = part.partition(":")
+            if separator:
+                permissions.update(f"{resource}:{action}" for action in actions.split(","))
+            else:
+                permissions.add(part)
+
+        return TokenClaims(
+            version=int(claims["pv"]),
+            roles=list(claims.get("r", [])),
+            permissions=permissions,
+            is_superuser=bool(claims.get("su"))
+        )
+    except Exception as e:
+        logger.warning(f"解析令牌权限声明失败: {e}")
+        return None
+
+def is_claims_current(claims: TokenClaims, db: Optional[Session] = None) -> bool:
+    """检查权限声明是否与当前全局权限版本一致"""
+    return claims.version == get_permission_version(db)
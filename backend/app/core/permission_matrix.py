@@ -0,0 +1,270 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 权限名称的段分隔符与通配段
+SEGMENT_SEPARATOR = ":"
+WILDCARD_SEGMENT = "*"
+
+# 前缀树节点的终止标记
+_END = object()
+
+def is_permission_pattern(name: str) -> bool:
+    """权限名称是否为通配模式（任一段为 *）"""
+    return WILDCARD_SEGMENT in name.split(SEGMENT_SEPARATOR)
+
+class PermissionTrie:
+    """
+    通配权限前缀树
+
+    按 ":" 分段编译授权模式。中间的 * 匹配恰好一段，
+    末尾的 * 匹配其后的一段或多段，例如 users:* 匹配 users:view，
+    system:*:read 匹配 system:logs:read，单独的 * 匹配任意权限。
+    一次检查的耗时与权限名称的段数成正比，与模式数量无关。
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self._root: dict = {}
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern: str) -> None:
+        """加入一个授权模式"""
+        node = self._root
+        for segment in pattern.split(SEGMENT_SEPARATOR):
+            node = node.setdefault(segment, {})
+        node[_END] = True
+
+    def matches(self, name: str) -> bool:
+        """权限名称是否被任一模式覆盖"""
+        return self._match(self._root, name.split(SEGMENT_SEPARATOR), 0)
+
+    def _match(self, node: dict, segments: List[str], index: int) -> bool:
+        if index == len(segments):
+            return _END in node
+
+        child = node.get(segments[index])
+        if child is not None and self._match(child, segments, index + 1):
+            return True
+
+        wildcard = node.get(WILDCARD_SEGMENT)
+        if wildcard is not None:
+            # 末尾的 * 覆盖剩余的所有段
+            if _END in wildcard:
+                return True
+            if self._match(wildcard, segments, index + 1):
+                return True
+
+        return False
+
+class PermissionMatrix:
+    """
+    内存中的角色-权限矩阵
+
+    每个权限分配一个位序号，每个角色对应一个位掩码，
+    "用户是否拥有X中任一权限" 即为掩码按位与。
+    含通配段的授权模式另外编译为每个角色的前缀树。
+
+    矩阵是进程内的副本，记录编译时的全局权限版本号；其他进程修改角色权限后
+    版本号递增，get_permission_version 发现更新的版本时重新加载矩阵。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version: Optional[int] = None
+        self._bits: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._role_masks: Dict[int, int] = {}
+        self._role_names: Dict[int, str] = {}
+        self._role_ids_by_name: Dict[str, int] = {}
+        self._role_tries: Dict[int, PermissionTrie] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def version(self) -> Optional[int]:
+        """编译矩阵时的全局权限版本号，未知时为 None"""
+        return self._version
+
+    def is_stale(self, version: int) -> bool:
+        """已加载的矩阵是否早于给定的全局权限版本"""
+        return self._loaded and (self._version is None or self._version < version)
+
+    def mark_version(self, version: int) -> None:
+        """本进程已增量更新矩阵，将其标记为给定版本"""
+        self._version = version
+
+    def load(self, db: Session, version: Optional[int] = None) -> None:
+        """
+        从 Permission、Role、RolePermission 全量编译矩阵
+
+        Args:
+            db: 数据库会话
+            version: 读取角色权限之前取得的全局权限版本号
+        """
+        from ..models.permission import Permission
+        from ..models.role import Role
+        from ..models.role_permission import RolePermission
+
+        permission_rows = db.query(Permission.id, Permission.name).order_by(Permission.id).all()
+        role_rows = db.query(Role.id, Role.name).all()
+        link_rows = db.query(RolePermission.role_id, RolePermission.permission_id).all()
+
+        bits = {name: index for index, (_, name) in enumerate(permission_rows)}
+        names = [name for _, name in permission_rows]
+        bit_by_permission_id = {permission_id: bits[name] for permission_id, name in permission_rows}
+
+        role_masks = {role_id: 0 for role_id, _ in role_rows}
+        role_patterns: Dict[int, List[str]] = {}
+        for role_id, permission_id in link_rows:
+            bit = bit_by_permission_id.get(permission_id)
+            if bit is not None and role_id in role_masks:
+                role_masks[role_id] |= 1 << bit
+                if is_permission_pattern(names[bit]):
+                    role_patterns.setdefault(role_id, []).append(names[bit])
+
+        with self._lock:
+            self._bits = bits
+            self._names = names
+            self._role_masks = role_masks
+            self._role_names = {role_id: name for role_id, name in role_rows}
+            self._role_ids_by_name = {name: role_id for role_id, name in role_rows}
+            self._role_tries = {
+                role_id: PermissionTrie(patterns) for role_id, patterns in role_patterns.items()
+            }
+            self._loaded = True
+            self._version = version
+
+        logger.info(f"权限矩阵编译完成: {len(names)} 个权限, {len(role_rows)} 个角色, 权限版本 {version}")
+
+    def ensure_loaded(self) -> None:
+        """未加载时使用独立会话加载矩阵"""
+        if self._loaded:
+            return
+        db = SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+
+    def set_role(self, role_id: int, name: str, permission_names: Optional[Iterable[str]] = None) -> None:
+        """
+        增量更新单个角色
+
+        Args:
+            role_id: 角色ID
+            name: 角色名称
+            permission_names: 角色的全部权限名称，为 None 时保留原有权限
+        """
+        self.ensure_loaded()
+        with self._lock:
+            old_name = self._role_names.get(role_id)
+            if old_name is not None and old_name != name:
+                self._role_ids_by_name.pop(old_name, None)
+            self._role_names[role_id] = name
+            self._role_ids_by_name[name] = role_id
+
+            if permission_names is not None:
+                permission_names = list(permission_names)
+                self._role_masks[role_id] = self._compute_mask(permission_names, register=True)
+                patterns = [permission for permission in permission_names if is_permission_pattern(permission)]
+                if patterns:
+                    self._role_tries[role_id] = PermissionTrie(patterns)
+                else:
+                    self._role_tries.pop(role_id, None)
+            else:
+                self._role_masks.setdefault(role_id, 0)
+
+    def remove_role(self, role_id: int) -> None:
+        """从矩阵中移除角色"""
+        with self._lock:
+            self._role_masks.pop(role_id, None)
+            self._role_tries.pop(role_id, None)
+            name = self._role_names.pop(role_id, None)
+            if name is not None:
+                self._role_ids_by_name.pop(name, None)
+
+    def role_ids_for(self, role_names: Iterable[str]) -> List[int]:
+        """角色名称对应的角色ID（未知角色忽略）"""
+        self.ensure_loaded()
+        role_ids_by_name = self._role_ids_by_name
+        return [role_ids_by_name[name] for name in role_names if name in role_ids_by_name]
+
+    def mask_for(self, permission_names: Iterable[str]) -> int:
+        """权限名称集合对应的位掩码（未知权限忽略）"""
+        self.ensure_loaded()
+        return self._compute_mask(permission_names, register=False)
+
+    def mask_for_roles(self, role_ids: Iterable[int]) -> int:
+        """多个角色权限掩码的并集"""
+        self.ensure_loaded()
+        mask = 0
+        role_masks = self._role_masks
+        for role_id in role_ids:
+            mask |= role_masks.get(role_id, 0)
+        return mask
+
+    def names_for(self, mask: int) -> List[str]:
+        """位掩码对应的权限名称"""
+        names = self._names
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(names[low.bit_length() - 1])
+            mask ^= low
+        return result
+
+    def roles_grant_any(self, role_ids: Iterable[int], required_permissions: Iterable[str]) -> bool:
+        """
+        角色是否授予所需权限中的任意一个
+
+        先以位掩码按位与匹配精确授权，未命中时再查询各角色的通配前缀树。
+        """
+        role_ids = list(role_ids)
+        required_permissions = list(required_permissions)
+
+        if self.mask_for_roles(role_ids) & self.mask_for(required_permissions):
+            return True
+
+        role_tries = self._role_tries
+        for role_id in role_ids:
+            trie = role_tries.get(role_id)
+            if trie is not None and any(trie.matches(permission) for permission in required_permissions):
+                return True
+
+        return False
+
+    def roles_and_permissions(self, role_ids: Iterable[int]) -> Tuple[List[str], List[str]]:
+        """根据角色ID获取角色名称和权限名称"""
+        self.ensure_loaded()
+        role_ids = list(role_ids)
+        role_names = [self._role_names[role_id] for role_id in role_ids if role_id in self._role_names]
+        return role_names, self.names_for(self.mask_for_roles(role_ids))
+
+    def _compute_mask(self, permission_names: Iterable[str], register: bool) -> int:
+        """计算位掩码，register 为 True 时为新权限分配位序号"""
+        mask = 0
+        for name in permission_names:
+            bit = self._bits.get(name)
+            if bit is None:
+                if not register:
+                    continue
+                bit = len(self._names)
+                self._bits[name] = bit
+                self._names.append(name)
+            mask |= 1 << bit
+        return mask
+
+# 全局权限矩阵实例
+permission_matrix = PermissionMatrix()
@@ -0,0 +1,75 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, raiseload
+
+from .config import settings
+
+# 连接上待完成语句的开始时间（同一连接上的语句可能嵌套执行）
+_START_TIMES_KEY = "query_stats_start_times"
+
+class QueryStats:
+    """单个请求内执行的SQL语句数与数据库耗时"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def record(self, seconds: float) -> None:
+        """记录一条语句"""
+        self.count += 1
+        self.duration += seconds
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 3)
+
+# 当前请求的统计对象，由 QueryStatsMiddleware 在请求开始时设置。
+# 存放可变对象：中间件之后的处理在复制的上下文中运行，只能修改对象而无法重新赋值
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def start_query_stats() -> QueryStats:
+    """为当前请求开始统计"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+def get_query_stats() -> Optional[QueryStats]:
+    """当前请求的统计，不在请求中时返回 None"""
+    return _current_stats.get()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_stats.get() is not None:
+        conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current_stats.get()
+    start_times = conn.info.get(_START_TIMES_KEY)
+    if stats is not None and start_times:
+        stats.record(time.perf_counter() - start_times.pop())
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    # 执行失败的语句不会触发 after_cursor_execute，丢弃其开始时间
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_START_TIMES_KEY):
+        connection.info[_START_TIMES_KEY].pop()
+
+@event.listens_for(Session, "do_orm_execute")
+def _raise_on_lazy_load(orm_execute_state) -> None:
+    """
+    严格模式下禁止关系属性的延迟加载
+
+    对每个顶层ORM查询追加 raiseload("*", sql_only=True)：查询中显式指定的
+    selectinload/joinedload 不受影响，可从会话标识映射直接取得的多对一关系也不受影响；
+    其余关系在访问时若需要发出SQL则抛出 InvalidRequestError，使N+1查询在测试中直接失败。
+    """
+    if not settings.SQL_STRICT_LAZY_LOAD:
+        return
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*", sql_only=True))
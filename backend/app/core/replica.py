@@ -0,0 +1,48 @@
+import asyncio
+import os
+import sqlite3
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+
+from .config import settings
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _sqlite_file(database_url: Optional[str]) -> Optional[str]:
+    """SQLite 文件数据库的路径，非SQLite或内存数据库返回 None"""
+    if not database_url:
+        return None
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    return url.database
+
+def is_sqlite_replica() -> bool:
+    """主库与只读副本是否均为 SQLite 文件（本地开发时由应用自行复制）"""
+    return _sqlite_file(settings.DATABASE_URL) is not None and _sqlite_file(settings.READ_DATABASE_URL) is not None
+
+def sync_sqlite_replica() -> None:
+    """使用 SQLite 在线备份接口将主库完整复制到副本文件"""
+    primary_path = _sqlite_file(settings.DATABASE_URL)
+    replica_path = _sqlite_file(settings.READ_DATABASE_URL)
+    os.makedirs(os.path.dirname(os.path.abspath(replica_path)), exist_ok=True)
+
+    timeout = settings.SQLITE_BUSY_TIMEOUT / 1000
+    source = sqlite3.connect(primary_path, timeout=timeout)
+    target = sqlite3.connect(replica_path, timeout=timeout)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+async def run_sqlite_replica_sync(interval: float) -> None:
+    """后台任务：按固定间隔复制主库到副本"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(sync_sqlite_replica)
+        except Exception as e:
+            logger.error(f"同步SQLite只读副本失败: {e}")
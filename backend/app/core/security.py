@@ -1,21 +1,27 @@
+import calendar
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from typing import List, Optional, Tuple, Union, Any
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from .config import settings
+from .hashing import password_hasher, pwd_context
+from .jwt_backend import TokenDecodeError, get_jwt_backend
+from .permission_claims import TokenClaims, encode_permission_claims, decode_permission_claims
+from .token_revocation import token_revocations
+from .sessions import is_session_mode, session_store
 from ..models.user import User
-from ..core.database import get_db
+from ..core.database import get_async_db
 from ..utils.logger import get_logger
+from ..utils.cache import principal_cache
 
 logger = get_logger(__name__)
 
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login-json")
 
@@ -35,8 +41,48 @@ def get_password_hash(password: str) -> str:
         logger.error(f"密码哈希生成失败: {e}")
         raise
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """创建访问令牌"""
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在哈希线程池中验证密码"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """在哈希线程池中生成密码哈希"""
+    return await password_hasher.run(get_password_hash, password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """验证密码，哈希不符合当前策略时一并返回新哈希"""
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception as e:
+        logger.error(f"密码验证失败: {e}")
+        return False, None
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """在哈希线程池中验证密码并按需重新哈希"""
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
+
+def _token_identity() -> dict:
+    """令牌的唯一ID与签发时间（精确到毫秒，用于按用户吊销）"""
+    return {"jti": uuid.uuid4().hex, "iat": round(time.time(), 3)}
+
+def create_access_token(
+    data: dict,
+    expires_delta: Optional[timedelta] = None,
+    roles: Optional[List[str]] = None,
+    permissions: Optional[List[str]] = None,
+    is_superuser: bool = False,
+    user_id: Optional[int] = None,
+    permission_version: Optional[int] = None,
+    db: Optional[Session] = None
+) -> str:
+    """
+    创建访问令牌，提供角色和权限时将其作为授权声明嵌入令牌
+
+    AUTH_TOKEN_MODE=session 时返回不透明的会话ID，声明保存在服务端会话表中，
+    user_id 用于按用户吊销会话。permission_version 为计算角色和权限时的全局权限版本号，
+    异步调用方应预先通过异步会话取得，避免在事件循环中同步查询数据库；
+    会话持久化时 db 用于写入会话表，异步调用方通过 run_sync 传入。
+    """
     logger.info(f"🏗️ 开始创建访问令牌，原始数据: {data}")
 
     to_encode = data.copy()
@@ -45,11 +91,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
 
-    to_encode.update({"exp": expire, "type": "access"})
-    logger.info(f"📦 准备编码的JWT数据: {to_encode}")
+    to_encode.update({"exp": expire, "type": "access", **_token_identity()})
+    if roles is not None or permissions is not None:
+        to_encode["authz"] = encode_permission_claims(roles or [], permissions or [], is_superuser, permission_version)
+    logger.debug(f"📦 准备编码的JWT数据: {to_encode}")
+
+    if is_session_mode():
+        to_encode["exp"] = calendar.timegm(expire.utctimetuple())
+        session_id = session_store.create(to_encode, user_id, db)
+        logger.info(f"✅ 会话令牌创建成功，用户: {user_id}")
+        return session_id
 
     try:
-        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        encoded_jwt = get_jwt_backend().encode(to_encode)
         logger.info(f"✅ 访问令牌创建成功，前缀: {encoded_jwt[:30]}..." if len(encoded_jwt) > 30 else f"令牌: {encoded_jwt}")
         return encoded_jwt
     except Exception as e:
@@ -66,61 +120,89 @@ def create_refresh_token(user_id: int, expires_delta: Optional[timedelta] = None
     to_encode = {
         "sub": str(user_id),
         "exp": expire,
-        "type": "refresh"
+        "type": "refresh",
+        **_token_identity()
     }
 
     try:
-        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        encoded_jwt = get_jwt_backend().encode(to_encode)
         return encoded_jwt
     except Exception as e:
         logger.error(f"创建刷新令牌失败: {e}")
         raise
 
-def verify_token(token: str, db: Session, token_type: str = "access") -> Optional[User]:
-    """验证令牌"""
+def _load_cached_user(db: Session, snapshot: dict) -> User:
+    """将缓存的用户快照挂载到当前会话，不产生SELECT"""
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+def decode_token(token: str, token_type: str = "access") -> Optional[dict]:
+    """
+    解码并校验令牌
+
+    JWT 只做签名与有效期校验，不访问数据库；会话模式开启持久化时，
+    内存未命中的会话需查询数据库（见 AuthContext.decode）。
+    """
     try:
-        logger.info(f"🔍 开始验证令牌，类型: {token_type}")
-        logger.info(f"🔑 令牌前缀: {token[:30]}..." if len(token) > 30 else f"令牌: {token}")
+        logger.debug(f"🔍 开始验证令牌，类型: {token_type}")
+
+        # 会话模式下访问令牌为会话ID，只查内存会话表
+        if token_type == "access" and is_session_mode():
+            payload = session_store.get(token)
+            if payload is None:
+                logger.warning("❌ 会话不存在或已失效")
+            return payload
 
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        logger.info(f"✅ JWT解码成功，payload: {payload}")
+        payload = get_jwt_backend().decode(token)
 
         # 检查令牌类型
         token_type_in_payload = payload.get("type")
-        logger.info(f"🔍 令牌中的类型: {token_type_in_payload}, 期望类型: {token_type}")
 
         # 兼容旧令牌：如果没有type字段，假设是access令牌
         if token_type_in_payload is None:
-            logger.info(f"⚠️ 令牌缺少type字段，假设为旧版本访问令牌")
+            logger.debug(f"⚠️ 令牌缺少type字段，假设为旧版本访问令牌")
             token_type_in_payload = "access"
             # 更新payload以保持一致性
             payload["type"] = "access"
 
         if token_type_in_payload != token_type:
             logger.warning(f"❌ 令牌类型不匹配: 期望{token_type}, 实际{token_type_in_payload}")
-            logger.warning(f"📄 完整payload内容: {payload}")
             return None
 
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             logger.warning("❌ 令牌中缺少用户ID")
-            logger.warning(f"📄 payload内容: {payload}")
             return None
 
-        logger.info(f"👤 令牌中的用户标识: {user_id}")
+        return payload
+    except TokenDecodeError as e:
+        logger.warning(f"JWT令牌验证失败: {type(e).__name__}: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"令牌解码过程出错: {type(e).__name__}: {e}")
+        return None
+
+def get_user_from_payload(payload: dict, db: Session) -> Optional[User]:
+    """根据已校验的令牌载荷加载用户"""
+    user_id: str = payload["sub"]
+    try:
+        # 优先从认证主体缓存获取
+        snapshot = principal_cache.get(user_id)
+        if snapshot is not None:
+            if token_revocations.is_revoked(payload, snapshot["id"], db):
+                logger.warning(f"❌ 令牌已被吊销: {user_id}")
+                return None
+            logger.debug(f"✅ 认证主体缓存命中: {user_id}")
+            return _load_cached_user(db, snapshot)
 
         # 兼容旧令牌：用户标识可能是ID或用户名
         user = None
         try:
             # 首先尝试作为ID查找
             user = db.query(User).filter(User.id == int(user_id)).first()
-            if user:
-                logger.info(f"✅ 通过ID找到用户: {user.username}")
         except ValueError:
             # 如果不是数字，尝试作为用户名查找
             user = db.query(User).filter(User.username == user_id).first()
-            if user:
-                logger.info(f"✅ 通过用户名找到用户: {user.username}")
 
         if user is None:
             logger.warning(f"❌ 用户不存在: {user_id}")
@@ -130,24 +212,114 @@ def verify_token(token: str, db: Session, token_type: str = "access") -> Optiona
             logger.warning(f"用户已被禁用: {user_id}")
             return None
 
-        logger.info(f"✅ 令牌验证成功，用户: {user.username}, is_superuser: {user.is_superuser}")
+        if token_revocations.is_revoked(payload, user.id, db):
+            logger.warning(f"❌ 令牌已被吊销: {user_id}")
+            return None
+
+        # 缓存用户快照，过期时间不晚于令牌的exp
+        principal_cache.set(user_id, user.to_dict(), payload.get("exp"))
+
+        logger.debug(f"✅ 令牌验证成功，用户: {user.username}, is_superuser: {user.is_superuser}")
         return user
-    except JWTError as e:
-        logger.warning(f"JWT令牌验证失败: {e}")
-        logger.warning(f"失败原因: {type(e).__name__}")
-        logger.warning(f"失败的令牌: {token[:30]}..." if len(token) > 30 else f"令牌: {token}")
-        logger.warning(f"使用的密钥算法: {settings.ALGORITHM}")
-        logger.warning(f"密钥前缀: {settings.SECRET_KEY[:10]}..." if len(settings.SECRET_KEY) > 10 else f"密钥: {settings.SECRET_KEY}")
-        return None
     except Exception as e:
-        logger.error(f"令牌验证过程出错: {e}")
-        logger.error(f"错误类型: {type(e).__name__}")
-        logger.error(f"失败的令牌: {token[:30]}..." if len(token) > 30 else f"令牌: {token}")
+        logger.error(f"加载令牌用户出错: {type(e).__name__}: {e}")
+        return None
+
+def verify_token(token: str, db: Session, token_type: str = "access") -> Optional[User]:
+    """验证令牌"""
+    payload = decode_token(token, token_type)
+    if payload is None:
+        return None
+
+    return get_user_from_payload(payload, db)
+
+class AuthContext:
+    """
+    请求级认证上下文
+
+    每个请求只解码一次令牌、只加载一次用户，
+    中间件与依赖项通过 request.state.auth 共享同一个实例。
+    异步代码先 await decode() 再在异步会话的 run_sync 中调用 get_user，
+    令牌解码与用户加载都不会在事件循环中同步访问数据库。
+    """
+
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self.user: Optional[User] = None
+        self.user_id: Optional[int] = None
+        self.username: Optional[str] = None
+        self._payload: Optional[dict] = None
+        self._claims: Optional[TokenClaims] = None
+        self._decoded = False
+        self._claims_decoded = False
+        self._user_loaded = False
+
+    @property
+    def payload(self) -> Optional[dict]:
+        """令牌载荷（首次访问时解码）"""
+        if not self._decoded:
+            self._decoded = True
+            if self.token:
+                self._payload = decode_token(self.token, "access")
+        return self._payload
+
+    async def decode(self) -> Optional[dict]:
+        """
+        解码令牌（供异步代码调用）
+
+        会话模式开启持久化时，会话可能需要从数据库加载，在线程池中解码，不阻塞事件循环。
+        """
+        if not self._decoded and self.token and is_session_mode() and session_store.persist:
+            payload = await run_in_threadpool(decode_token, self.token, "access")
+            if not self._decoded:
+                self._payload = payload
+                self._decoded = True
+        return self.payload
+
+    @property
+    def claims(self) -> Optional[TokenClaims]:
+        """令牌中的授权声明（首次访问时解码）"""
+        if not self._claims_decoded:
+            self._claims_decoded = True
+            if self.payload is not None:
+                self._claims = decode_permission_claims(self.payload.get("authz"))
+        return self._claims
+
+    def get_user(self, db: Session) -> Optional[User]:
+        """获取当前用户（首次调用时加载）"""
+        if not self._user_loaded:
+            self._user_loaded = True
+            if self.payload is not None:
+                self.user = get_user_from_payload(self.payload, db)
+            if self.user is not None:
+                # 保存标量值，会话关闭后仍可安全读取
+                self.user_id = self.user.id
+                self.username = self.user.username
+        return self.user
+
+def _extract_bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """从Authorization头中提取Bearer令牌"""
+    if not authorization:
+        return None
+
+    parts = authorization.split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
         return None
 
+    return parts[1]
+
+def get_auth_context(request: Request) -> AuthContext:
+    """获取（必要时创建）当前请求的认证上下文"""
+    context = getattr(request.state, "auth", None)
+    if context is None:
+        context = AuthContext(_extract_bearer_token(request.headers.get("authorization")))
+        request.state.auth = context
+    return context
+
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """获取当前用户"""
     credentials_exception = HTTPException(
@@ -156,8 +328,11 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    user = verify_token(token, db, "access")
+    # 用户加载逻辑与中间件共用同步实现，在异步会话的 run_sync 中执行，不阻塞事件循环
+    context = get_auth_context(request)
+    await context.decode()
+    user = await db.run_sync(context.get_user)
     if user is None:
         raise credentials_exception
 
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,299 @@
+import asyncio
+import hashlib
+import json
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from ..models.user_session import UserSession
+from ..utils.logger import get_logger
+from ..utils.timeutils import utc_timestamp
+
+logger = get_logger(__name__)
+
+# 内存会话表的过期清扫间隔（秒）
+SWEEP_INTERVAL = 60
+
+class SessionStore:
+    """
+    服务端会话表
+
+    访问令牌是随机生成的不透明会话ID，会话声明（与JWT载荷结构相同）保存在进程内字典中，
+    校验令牌只需一次字典查找。吊销与空闲超时直接作用于字典，立即生效。
+    开启持久化时会话同时写入 user_sessions 表（只保存令牌的SHA-256摘要），
+    启动时加载，内存未命中时回查数据库，因此重启后会话仍然有效。
+    校验会话本身不写数据库：最近访问时间与过期会话的删除先记在内存中，
+    由后台任务按 touch_interval 批量写入（见 run_session_flush）。
+    """
+
+    def __init__(self, idle_timeout: int, persist: bool, touch_interval: int):
+        self.idle_timeout = idle_timeout
+        self.persist = persist
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self._last_sweep = time.time()
+        self._pending_touches: Dict[str, float] = {}
+        self._pending_removals: Set[str] = set()
+
+    def create(self, claims: Dict[str, Any], user_id: Optional[int] = None, db: Optional[Session] = None) -> str:
+        """
+        创建会话
+
+        Args:
+            claims: 会话声明，exp 为时间戳
+            user_id: 用户ID，用于按用户吊销
+            db: 持久化使用的数据库会话（异步请求中传入 run_sync 提供的会话），为空时使用独立会话
+
+        Returns:
+            会话令牌
+        """
+        session_id = secrets.token_urlsafe(32)
+        key = self._hash(session_id)
+        now = time.time()
+        entry = {
+            "claims": claims,
+            "user_id": user_id,
+            "expires": float(claims["exp"]),
+            "last_seen": now,
+            "persisted_seen": now
+        }
+
+        with self._lock:
+            self._add(key, entry)
+            swept = now - self._last_sweep >= SWEEP_INTERVAL
+            if swept:
+                self._sweep(now)
+
+        if self.persist:
+            own_session = db is None
+            if own_session:
+                db = SessionLocal()
+            try:
+                if swept:
+                    db.query(UserSession).filter(
+                        UserSession.expires_at < datetime.utcnow()
+                    ).delete(synchronize_session=False)
+                db.add(UserSession(
+                    session_hash=key,
+                    user_id=user_id,
+                    claims=json.dumps(claims),
+                    expires_at=datetime.utcfromtimestamp(entry["expires"]),
+                    last_seen_at=datetime.utcfromtimestamp(now)
+                ))
+                db.commit()
+            finally:
+                if own_session:
+                    db.close()
+
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取会话声明并刷新最近访问时间
+
+        只有持久化模式下内存未命中时才查询数据库，其余情况不访问数据库。
+
+        Returns:
+            会话声明（附带 sid），会话不存在、已过期或空闲超时时返回 None
+        """
+        key = self._hash(session_id)
+        entry = self._sessions.get(key)
+        if entry is None and self.persist:
+            entry = self._load_one(key)
+        if entry is None:
+            return None
+
+        now = time.time()
+        if now >= entry["expires"] or now - entry["last_seen"] > self.idle_timeout:
+            logger.info(f"会话已过期或空闲超时: 用户 {entry['user_id']}")
+            with self._lock:
+                self._pop(key)
+                if self.persist:
+                    self._pending_touches.pop(key, None)
+                    self._pending_removals.add(key)
+            return None
+
+        entry["last_seen"] = now
+        if self.persist and now - entry["persisted_seen"] >= self.touch_interval:
+            entry["persisted_seen"] = now
+            with self._lock:
+                self._pending_touches[key] = now
+
+        return {**entry["claims"], "sid": session_id}
+
+    def revoke(self, session_id: str, db: Optional[Session] = None) -> None:
+        """
+        吊销单个会话
+
+        Args:
+            session_id: 会话令牌
+            db: 数据库会话，删除语句由调用方提交；为空时使用独立会话并立即提交
+        """
+        self._remove_keys([self._hash(session_id)], db)
+
+    def revoke_user(self, user_id: int, db: Optional[Session] = None) -> None:
+        """吊销用户的全部会话（db 的含义同 revoke）"""
+        with self._lock:
+            keys = list(self._keys_by_user.get(user_id, ()))
+        self._remove_keys(keys, db, user_id=user_id)
+
+    def flush(self) -> None:
+        """将积攒的最近访问时间与过期会话删除批量写入数据库"""
+        with self._lock:
+            touches, self._pending_touches = self._pending_touches, {}
+            removals, self._pending_removals = self._pending_removals, set()
+        if not touches and not removals:
+            return
+
+        db = SessionLocal()
+        try:
+            if touches:
+                # 表级UPDATE配合参数列表，以 executemany 一次写入全部会话
+                table = UserSession.__table__
+                db.execute(
+                    update(table)
+                    .where(table.c.session_hash == bindparam("key"))
+                    .values(last_seen_at=bindparam("seen")),
+                    [
+                        {"key": key, "seen": datetime.utcfromtimestamp(seen)}
+                        for key, seen in touches.items()
+                    ]
+                )
+            if removals:
+                db.query(UserSession).filter(
+                    UserSession.session_hash.in_(removals)
+                ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"写入会话访问时间失败: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def load(self, db: Session) -> None:
+        """清理过期会话并从数据库加载其余会话（仅持久化模式）"""
+        if not self.persist:
+            return
+
+        purged = db.query(UserSession).filter(
+            UserSession.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        rows = db.query(UserSession).all()
+        with self._lock:
+            for row in rows:
+                self._add(row.session_hash, self._entry_from_row(row))
+
+        logger.info(f"会话表加载完成: {len(rows)} 个会话, 清理过期会话 {purged} 个")
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @staticmethod
+    def _hash(session_id: str) -> str:
+        return hashlib.sha256(session_id.encode()).hexdigest()
+
+    def _entry_from_row(self, row: UserSession) -> Dict[str, Any]:
+        last_seen = utc_timestamp(row.last_seen_at)
+        return {
+            "claims": json.loads(row.claims),
+            "user_id": row.user_id,
+            "expires": utc_timestamp(row.expires_at),
+            "last_seen": last_seen,
+            "persisted_seen": last_seen
+        }
+
+    def _add(self, key: str, entry: Dict[str, Any]) -> None:
+        """调用方需持有锁"""
+        self._sessions[key] = entry
+        if entry["user_id"] is not None:
+            self._keys_by_user.setdefault(entry["user_id"], set()).add(key)
+
+    def _pop(self, key: str) -> None:
+        """调用方需持有锁"""
+        entry = self._sessions.pop(key, None)
+        if entry is None or entry["user_id"] is None:
+            return
+        user_keys = self._keys_by_user.get(entry["user_id"])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[entry["user_id"]]
+
+    def _load_one(self, key: str) -> Optional[Dict[str, Any]]:
+        """内存未命中时从数据库加载会话（例如由其他进程创建）"""
+        db = SessionLocal()
+        try:
+            row = db.query(UserSession).filter(UserSession.session_hash == key).first()
+            if row is None:
+                return None
+            entry = self._entry_from_row(row)
+        finally:
+            db.close()
+
+        with self._lock:
+            self._add(key, entry)
+        return entry
+
+    def _remove_keys(self, keys, db: Optional[Session] = None, user_id: Optional[int] = None) -> None:
+        """从内存和数据库中删除会话，传入 db 时由调用方提交"""
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+                self._pending_touches.pop(key, None)
+
+        if not self.persist:
+            return
+
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            query = db.query(UserSession)
+            if user_id is not None:
+                query = query.filter(UserSession.user_id == user_id)
+            else:
+                query = query.filter(UserSession.session_hash.in_(keys))
+            query.delete(synchronize_session=False)
+            if own_session:
+                db.commit()
+        finally:
+            if own_session:
+                db.close()
+
+    def _sweep(self, now: float) -> None:
+        """清理内存中已过期或空闲超时的会话，调用方需持有锁"""
+        self._last_sweep = now
+        stale = [
+            key for key, entry in self._sessions.items()
+            if now >= entry["expires"] or now - entry["last_seen"] > self.idle_timeout
+        ]
+        for key in stale:
+            self._pop(key)
+
+def is_session_mode() -> bool:
+    """访问令牌是否为服务端会话"""
+    return settings.AUTH_TOKEN_MODE == "session"
+
+# 全局会话表实例
+session_store = SessionStore(
+    idle_timeout=settings.SESSION_IDLE_TIMEOUT_MINUTES * 60,
+    persist=settings.SESSION_PERSIST,
+    touch_interval=settings.SESSION_TOUCH_INTERVAL
+)
+
+async def run_session_flush(interval: float) -> None:
+    """后台任务：按固定间隔批量写入会话的最近访问时间"""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(session_store.flush)
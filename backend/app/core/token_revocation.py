@@ -0,0 +1,217 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .sessions import session_store
+from ..models.revoked_token import RevokedToken
+from ..utils.bloom import BloomFilter
+from ..utils.logger import get_logger
+from ..utils.timeutils import utc_timestamp
+
+logger = get_logger(__name__)
+
+class TokenRevocationList:
+    """
+    令牌吊销列表
+
+    吊销记录持久化在 revoked_tokens 表中，进程内以布隆过滤器镜像已吊销的 jti，
+    并保存每个用户"吊销此前签发的全部令牌"的时间点。
+    绝大多数请求的 jti 不在过滤器中，无需访问数据库即可放行；
+    过滤器命中时再查询数据库排除误报。
+    其他进程写入的吊销记录按ID增量同步，过期记录在写入吊销记录时按间隔清理并重建过滤器。
+    请求中的查询均使用调用方传入的会话（异步会话的 run_sync 中即走异步驱动），不另开同步连接。
+    """
+
+    def __init__(self, capacity: int, error_rate: float, sync_interval: int, purge_interval: int):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._user_cutoffs: Dict[int, float] = {}
+        self._last_id = 0
+        self._last_sync = 0.0
+        self._last_purge = 0.0
+
+    def load(self, db: Session) -> None:
+        """清理过期记录并从数据库全量重建过滤器"""
+        purged = db.query(RevokedToken).filter(
+            RevokedToken.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        rows = db.query(
+            RevokedToken.id, RevokedToken.jti, RevokedToken.user_id, RevokedToken.revoked_before
+        ).order_by(RevokedToken.id).all()
+
+        # 记录数超过预期容量时扩容，保持误报率
+        bloom = BloomFilter(max(self.capacity, len(rows) * 2), self.error_rate)
+        user_cutoffs: Dict[int, float] = {}
+        last_id = self._apply_rows(rows, bloom, user_cutoffs)
+
+        now = time.monotonic()
+        with self._lock:
+            self._bloom = bloom
+            self._user_cutoffs = user_cutoffs
+            self._last_id = max(last_id, self._last_id)
+            self._last_sync = now
+            self._last_purge = now
+
+        logger.info(f"令牌吊销列表加载完成: {len(rows)} 条记录, 清理过期记录 {purged} 条")
+
+    def sync(self, db: Session) -> None:
+        """增量同步其他进程写入的吊销记录（只读）"""
+        rows = db.query(
+            RevokedToken.id, RevokedToken.jti, RevokedToken.user_id, RevokedToken.revoked_before
+        ).filter(RevokedToken.id > self._last_id).order_by(RevokedToken.id).all()
+
+        with self._lock:
+            last_id = self._apply_rows(rows, self._bloom, self._user_cutoffs)
+            self._last_id = max(last_id, self._last_id)
+            self._last_sync = time.monotonic()
+
+    def is_revoked(self, payload: dict, user_id: int, db: Session) -> bool:
+        """
+        令牌是否已被吊销
+
+        Args:
+            payload: 已校验的令牌载荷
+            user_id: 令牌所属用户ID
+            db: 数据库会话，到期同步与过滤器命中后的确认查询使用该会话
+        """
+        self._sync_if_due(db)
+
+        cutoff = self._user_cutoffs.get(user_id)
+        if cutoff is not None and float(payload.get("iat") or 0) < cutoff:
+            return True
+
+        jti = payload.get("jti")
+        if jti and jti in self._bloom:
+            return self._confirm(jti, db)
+
+        return False
+
+    def revoke_token(self, db: Session, payload: dict, user_id: int) -> bool:
+        """
+        吊销单个令牌
+
+        Args:
+            db: 数据库会话
+            payload: 令牌载荷
+            user_id: 令牌所属用户ID
+
+        Returns:
+            是否写入了吊销记录（旧令牌没有 jti 时无法单独吊销）
+        """
+        # 会话令牌直接从会话表删除；仍写入jti记录，供其他进程同步
+        if payload.get("sid"):
+            session_store.revoke(payload["sid"], db)
+            db.commit()
+
+        jti = payload.get("jti")
+        if not jti:
+            logger.warning(f"令牌缺少jti，无法单独吊销: 用户 {user_id}")
+            return False
+
+        record = RevokedToken(
+            jti=jti,
+            user_id=user_id,
+            expires_at=datetime.utcfromtimestamp(int(payload["exp"]))
+        )
+        db.add(record)
+        try:
+            db.commit()
+        except IntegrityError:
+            # 已被吊销
+            db.rollback()
+
+        with self._lock:
+            self._bloom.add(jti)
+        self._purge_if_due(db)
+
+        logger.info(f"令牌已吊销: 用户 {user_id}, jti {jti}")
+        return True
+
+    def revoke_all_for_user(self, db: Session, user_id: int) -> None:
+        """
+        吊销用户此前签发的全部令牌
+
+        记录保留到最长的刷新令牌也已过期为止。
+        """
+        now = datetime.utcnow()
+        lifetime = max(settings.ACCESS_TOKEN_EXPIRE_MINUTES, settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+        record = RevokedToken(
+            user_id=user_id,
+            revoked_before=now,
+            expires_at=now + timedelta(minutes=lifetime)
+        )
+        db.add(record)
+        session_store.revoke_user(user_id, db)
+        db.commit()
+
+        with self._lock:
+            self._set_cutoff(self._user_cutoffs, user_id, utc_timestamp(now))
+        self._purge_if_due(db)
+
+        logger.info(f"用户全部令牌已吊销: 用户 {user_id}")
+
+    def _sync_if_due(self, db: Session) -> None:
+        """距上次同步超过间隔时增量同步"""
+        if time.monotonic() - self._last_sync < self.sync_interval:
+            return
+
+        try:
+            self.sync(db)
+        except Exception as e:
+            logger.error(f"同步令牌吊销列表失败: {e}")
+            # 避免数据库异常时每个请求都重试
+            self._last_sync = time.monotonic()
+
+    def _purge_if_due(self, db: Session) -> None:
+        """距上次清理超过间隔时清理过期记录并重建过滤器（过期记录只随吊销写入而增加）"""
+        if time.monotonic() - self._last_purge < self.purge_interval:
+            return
+
+        try:
+            self.load(db)
+        except Exception as e:
+            logger.error(f"清理过期吊销记录失败: {e}")
+            db.rollback()
+            self._last_purge = time.monotonic()
+
+    @staticmethod
+    def _confirm(jti: str, db: Session) -> bool:
+        """过滤器命中后查询数据库，排除误报"""
+        return db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is not None
+
+    def _apply_rows(self, rows, bloom: BloomFilter, user_cutoffs: Dict[int, float]) -> int:
+        """将吊销记录写入过滤器和用户时间点，返回最大ID"""
+        last_id = 0
+        for row_id, jti, user_id, revoked_before in rows:
+            if jti:
+                bloom.add(jti)
+            elif revoked_before is not None and user_id is not None:
+                self._set_cutoff(user_cutoffs, user_id, utc_timestamp(revoked_before))
+            last_id = row_id
+        return last_id
+
+    @staticmethod
+    def _set_cutoff(user_cutoffs: Dict[int, float], user_id: int, cutoff: float) -> None:
+        """只保留最晚的吊销时间点"""
+        current: Optional[float] = user_cutoffs.get(user_id)
+        if current is None or cutoff > current:
+            user_cutoffs[user_id] = cutoff
+
+# 全局令牌吊销列表实例
+token_revocations = TokenRevocationList(
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_INTERVAL,
+    purge_interval=settings.TOKEN_REVOCATION_PURGE_INTERVAL
+)
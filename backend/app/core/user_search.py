@@ -0,0 +1,127 @@
+from typing import Optional
+
+from sqlalchemy import Integer, column, or_, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..models.user import User
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 用户全文索引表（外部内容表，内容取自 users，由触发器同步）
+USER_FTS_TABLE = "users_fts"
+
+# trigram 分词按三个字符切分，更短的关键词无法匹配索引
+FTS_MIN_KEYWORD_LENGTH = 3
+
+_USER_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {USER_FTS_TABLE} USING fts5(
+        full_name, email, username,
+        content='users', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_after_insert AFTER INSERT ON users BEGIN
+        INSERT INTO {USER_FTS_TABLE}(rowid, full_name, email, username)
+        VALUES (new.id, new.full_name, new.email, new.username);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_after_delete AFTER DELETE ON users BEGIN
+        INSERT INTO {USER_FTS_TABLE}({USER_FTS_TABLE}, rowid, full_name, email, username)
+        VALUES ('delete', old.id, old.full_name, old.email, old.username);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_after_update
+    AFTER UPDATE OF full_name, email, username ON users BEGIN
+        INSERT INTO {USER_FTS_TABLE}({USER_FTS_TABLE}, rowid, full_name, email, username)
+        VALUES ('delete', old.id, old.full_name, old.email, old.username);
+        INSERT INTO {USER_FTS_TABLE}(rowid, full_name, email, username)
+        VALUES (new.id, new.full_name, new.email, new.username);
+    END
+    """,
+]
+
+# 当前数据库是否可用全文索引（由 ensure_user_search_index 在启动时确定）
+_fts_enabled = False
+
+def is_fts_enabled() -> bool:
+    """用户全文索引是否可用"""
+    return _fts_enabled
+
+def _supports_fts5_trigram(connection: Connection) -> bool:
+    """SQLite 是否编译了 FTS5 且支持 trigram 分词（3.34+）"""
+    try:
+        connection.exec_driver_sql("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x, tokenize='trigram')")
+        connection.exec_driver_sql("DROP TABLE temp._fts5_probe")
+        return True
+    except Exception:
+        return False
+
+def rebuild_user_search_index(connection: Connection) -> None:
+    """根据 users 表重建全文索引"""
+    connection.exec_driver_sql(f"INSERT INTO {USER_FTS_TABLE}({USER_FTS_TABLE}) VALUES ('rebuild')")
+
+def ensure_user_search_index(engine: Engine) -> bool:
+    """
+    创建用户全文索引表与同步触发器
+
+    仅 SQLite 且支持 FTS5 trigram 时启用；索引表为新建时从 users 表全量构建。
+    不可用时关键词搜索回退为 LIKE。
+    """
+    global _fts_enabled
+
+    if engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return False
+
+    with engine.begin() as connection:
+        if not _supports_fts5_trigram(connection):
+            logger.warning("SQLite 不支持 FTS5 trigram 分词，用户关键词搜索使用 LIKE")
+            _fts_enabled = False
+            return False
+
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": USER_FTS_TABLE}
+        ).first() is not None
+
+        for statement in _USER_FTS_DDL:
+            connection.exec_driver_sql(statement)
+
+        if not exists:
+            rebuild_user_search_index(connection)
+            logger.info("用户全文索引已创建")
+
+    _fts_enabled = True
+    return True
+
+def _fts_phrase(keyword: str) -> str:
+    """将关键词转为 FTS5 短语查询，避免关键词中的运算符被解析"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+def user_keyword_filter(keyword: str) -> Optional[ColumnElement]:
+    """
+    用户关键词搜索条件（姓名、邮箱、用户名的子串匹配）
+
+    全文索引可用且关键词不短于三个字符时使用 FTS5，否则使用 LIKE。
+    """
+    keyword = keyword.strip()
+    if not keyword:
+        return None
+
+    if _fts_enabled and len(keyword) >= FTS_MIN_KEYWORD_LENGTH:
+        return User.id.in_(
+            text(f"SELECT rowid FROM {USER_FTS_TABLE} WHERE {USER_FTS_TABLE} MATCH :fts_keyword")
+            .bindparams(fts_keyword=_fts_phrase(keyword))
+            .columns(column("rowid", Integer))
+        )
+
+    return or_(
+        User.full_name.like(f"%{keyword}%"),
+        User.email.like(f"%{keyword}%"),
+        User.username.like(f"%{keyword}%")
+    )
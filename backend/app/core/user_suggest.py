@@ -0,0 +1,111 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..models.user import User
+from ..utils.logger import get_logger
+from ..utils.prefix_index import PrefixIndex
+
+logger = get_logger(__name__)
+
+# 会话中待应用到索引的用户变更（提交后生效，回滚时丢弃）
+_PENDING_KEY = "user_suggest_changes"
+
+class UserSuggestIndex:
+    """
+    用户名与邮箱的前缀联想索引
+
+    启动时全量加载，之后由 ORM 会话事件在事务提交后增量维护。
+    键统一转为小写，查询不区分大小写。
+    """
+
+    def __init__(self):
+        self._prefixes = PrefixIndex()
+        self._users: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(record: Dict[str, Any]) -> List[str]:
+        return [key for key in ((record["username"] or "").lower(), (record["email"] or "").lower()) if key]
+
+    @staticmethod
+    def _record(user_id: int, username: str, email: str, full_name: Optional[str]) -> Dict[str, Any]:
+        return {
+            "id": f"USR-{user_id}",
+            "name": full_name or username,
+            "username": username,
+            "email": email
+        }
+
+    def load(self, db: Session) -> None:
+        """从 users 表全量构建索引"""
+        rows = db.execute(select(User.id, User.username, User.email, User.full_name)).all()
+        users = {row.id: self._record(row.id, row.username, row.email, row.full_name) for row in rows}
+        with self._lock:
+            self._users = users
+            self._prefixes.rebuild(
+                (key, user_id) for user_id, record in users.items() for key in self._keys(record)
+            )
+        logger.info(f"用户联想索引构建完成: {len(users)} 个用户")
+
+    def upsert(self, user_id: int, username: str, email: str, full_name: Optional[str]) -> None:
+        """新增或更新用户，字段未变化时不改动索引"""
+        record = self._record(user_id, username, email, full_name)
+        with self._lock:
+            old = self._users.get(user_id)
+            if old == record:
+                return
+            if old is not None:
+                for key in self._keys(old):
+                    self._prefixes.remove(key, user_id)
+            self._users[user_id] = record
+            for key in self._keys(record):
+                self._prefixes.add(key, user_id)
+
+    def remove(self, user_id: int) -> None:
+        """移除用户"""
+        with self._lock:
+            old = self._users.pop(user_id, None)
+            if old is not None:
+                for key in self._keys(old):
+                    self._prefixes.remove(key, user_id)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """按用户名或邮箱前缀查询用户"""
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+        users = self._users
+        return [users[user_id] for user_id in self._prefixes.search(prefix, limit) if user_id in users]
+
+# 全局用户联想索引实例
+user_suggest_index = UserSuggestIndex()
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_changes(session: Session, flush_context) -> None:
+    """记录本次flush中新增、修改、删除的用户"""
+    for obj in session.new | session.dirty:
+        if isinstance(obj, User):
+            session.info.setdefault(_PENDING_KEY, {})[obj.id] = (obj.username, obj.email, obj.full_name)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            session.info.setdefault(_PENDING_KEY, {})[obj.id] = None
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_changes(session: Session) -> None:
+    """事务提交后将用户变更应用到联想索引"""
+    changes = session.info.pop(_PENDING_KEY, None)
+    if not changes:
+        return
+    for user_id, fields in changes.items():
+        if fields is None:
+            user_suggest_index.remove(user_id)
+        else:
+            user_suggest_index.upsert(user_id, *fields)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session: Session) -> None:
+    """事务回滚时丢弃未提交的用户变更"""
+    session.info.pop(_PENDING_KEY, None)
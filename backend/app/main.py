@@ -2,10 +2,19 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 from datetime import datetime
 
 from .core.config import settings
-from .core.database import init_db
+from .core.database import init_db, SessionLocal, async_engine, read_async_engine
+from .core.replica import is_sqlite_replica, run_sqlite_replica_sync, sync_sqlite_replica
+from .core.permission_matrix import permission_matrix
+from .core.permission_claims import get_permission_version
+from .core.token_revocation import token_revocations
+from .core.sessions import session_store, run_session_flush
+from .core.user_suggest import user_suggest_index
+from .core.hashing import password_hasher, apply_hashing_policy
+from .core.jwt_backend import configure_jwt_backend
 from .utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,12 +24,46 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时执行
     logger.info("后台管理系统启动中...")
+    replica_sync_task = None
+    session_flush_task = None
 
     try:
+        # 按本机性能确定密码哈希策略
+        rounds = apply_hashing_policy()
+        logger.info(f"密码哈希策略: bcrypt {rounds}轮")
+
+        # 创建JWT后端，密钥配置有误时在启动阶段报错
+        configure_jwt_backend()
+
         # 初始化数据库
         init_db()
         logger.info("数据库初始化完成")
 
+        # 编译角色-权限矩阵，加载令牌吊销列表、持久化的会话和用户联想索引
+        db = SessionLocal()
+        try:
+            permission_matrix.load(db, get_permission_version(db))
+            token_revocations.load(db)
+            session_store.load(db)
+            user_suggest_index.load(db)
+        finally:
+            db.close()
+
+        # 本地开发时只读副本为另一个SQLite文件，由应用定期从主库复制
+        if is_sqlite_replica():
+            sync_sqlite_replica()
+            if settings.READ_REPLICA_SYNC_INTERVAL > 0:
+                replica_sync_task = asyncio.create_task(
+                    run_sqlite_replica_sync(settings.READ_REPLICA_SYNC_INTERVAL)
+                )
+            logger.info(f"SQLite只读副本已同步，同步间隔: {settings.READ_REPLICA_SYNC_INTERVAL}秒")
+
+        # 会话的最近访问时间在内存中积攒，定期批量写入数据库
+        if session_store.persist:
+            session_flush_task = asyncio.create_task(
+                run_session_flush(max(settings.SESSION_TOUCH_INTERVAL, 1))
+            )
+
         # 应用启动完成
         logger.info(f"{settings.APP_NAME} v{settings.APP_VERSION} 启动成功")
         logger.info(f"服务运行在: http://{settings.HOST}:{settings.PORT}")
@@ -34,6 +77,15 @@ async def lifespan(app: FastAPI):
 
     # 关闭时执行
     logger.info("后台管理系统正在关闭...")
+    password_hasher.shutdown()
+    if replica_sync_task is not None:
+        replica_sync_task.cancel()
+    if session_flush_task is not None:
+        session_flush_task.cancel()
+        await asyncio.to_thread(session_store.flush)
+    await async_engine.dispose()
+    if read_async_engine is not None:
+        await read_async_engine.dispose()
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -58,10 +110,12 @@ app.add_middleware(
 logger.info("✅ CORS中间件已配置")
 
 # 全局斜杠处理中间件（最先执行，确保路径规范化）
-from .middleware import TrailingSlashMiddleware, UserContextMiddleware, AuditLogMiddleware
+from .middleware import TrailingSlashMiddleware, UserContextMiddleware, AuditLogMiddleware, QueryStatsMiddleware
 app.add_middleware(TrailingSlashMiddleware)
 app.add_middleware(UserContextMiddleware)
 app.add_middleware(AuditLogMiddleware)
+# SQL语句统计放在上述中间件外层，审计日志等中间件执行的语句也计入请求
+app.add_middleware(QueryStatsMiddleware)
 
 # 全局异常处理
 @app.exception_handler(HTTPException)
@@ -74,7 +128,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "message": exc.detail,
             "status_code": exc.status_code,
             "path": str(request.url)
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 from fastapi.exceptions import RequestValidationError
@@ -197,6 +252,7 @@ async def health_check():
     logger.debug("执行健康检查")
 
     # 检查数据库连接状态
+    from .core.database import get_pool_statistics
     try:
         from .core.database import SessionLocal
         from sqlalchemy import text
@@ -211,7 +267,9 @@ async def health_check():
     return {
         "status": status,
         "timestamp": datetime.utcnow().isoformat() + "Z",
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "password_hashing": password_hasher.metrics(),
+        "database_pool": get_pool_statistics()
     }
 
 
@@ -1,5 +1,6 @@
-from .audit_log import AuditLogMiddleware
+from .audit_log import AuditLogMiddleware, get_client_ip
 from .user_context import UserContextMiddleware
 from .trailing_slash import TrailingSlashMiddleware
+from .query_stats import QueryStatsMiddleware
 
-__all__ = ["AuditLogMiddleware", "UserContextMiddleware", "TrailingSlashMiddleware"]
\ No newline at end of file
+__all__ = ["AuditLogMiddleware", "UserContextMiddleware", "TrailingSlashMiddleware", "QueryStatsMiddleware", "get_client_ip"]
\ No newline at end of file
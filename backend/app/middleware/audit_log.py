@@ -1,19 +1,72 @@
 from fastapi import Request, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
-from sqlalchemy.orm import Session
-from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple, Union
 import json
 import time
 from datetime import datetime
+from functools import lru_cache
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
 
-from ..core.database import get_db
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
 from ..models.operation_log import OperationLog
-from ..models.user import User
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+def get_client_ip(request: Request) -> str:
+    """
+    获取客户端IP地址
+
+    只有直连地址属于 TRUSTED_PROXIES 时才采用代理转发头，否则客户端可以伪造
+    X-Forwarded-For 绕过按IP限流。X-Forwarded-For 从右向左跳过可信代理，
+    取第一个不可信的地址。
+    """
+    peer = request.client.host if getattr(request, "client", None) else None
+    if peer is None:
+        return "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not _is_trusted_proxy(hop):
+                return hop
+        if hops:
+            return hops[0]
+
+    real_ip = request.headers.get("x-real-ip")
+    if real_ip:
+        return real_ip.strip()
+
+    return peer
+
+@lru_cache(maxsize=8)
+def _parse_networks(proxies: Tuple[str, ...]) -> Tuple[Union[IPv4Network, IPv6Network], ...]:
+    """解析可信代理配置，无效条目记录警告后忽略"""
+    networks = []
+    for proxy in proxies:
+        try:
+            networks.append(ip_network(proxy.strip(), strict=False))
+        except ValueError:
+            logger.warning(f"忽略无效的可信代理配置: {proxy}")
+    return tuple(networks)
+
+def _is_trusted_proxy(host: str) -> bool:
+    """地址是否属于已配置的可信代理"""
+    networks = _parse_networks(tuple(settings.TRUSTED_PROXIES))
+    if not networks:
+        return False
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
 class AuditLogMiddleware(BaseHTTPMiddleware):
     """审计日志中间件"""
 
@@ -75,15 +128,6 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
         client_ip = self._get_client_ip(request)
         user_agent = request.headers.get("user-agent", "")
 
-        # 获取当前用户（如果已登录）
-        current_user = None
-        try:
-            # 尝试从请求中获取用户信息
-            if hasattr(request.state, 'user'):
-                current_user = request.state.user
-        except Exception:
-            pass
-
         # 准备记录请求体（仅对非敏感接口）
         request_data = None
         if method in ["POST", "PUT", "PATCH"] and not self._is_sensitive_path(path):
@@ -136,10 +180,8 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
 
             # 记录操作日志
             try:
-                db_session = next(get_db())
-                self._log_operation(
-                    db=db_session,
-                    user=current_user,
+                await self._record(
+                    request=request,
                     method=method,
                     path=path,
                     status_code=response.status_code,
@@ -148,7 +190,6 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
                     request_data=request_data,
                     response_data=response_data
                 )
-                db_session.close()
             except Exception as e:
                 logger.error(f"审计日志记录异常: {str(e)}")
 
@@ -158,9 +199,8 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
             # 记录异常
             process_time = round((time.time() - start_time) * 1000, 2)
 
-            self._log_operation(
-                db=next(get_db()),
-                user=current_user,
+            await self._record(
+                request=request,
                 method=method,
                 path=path,
                 status_code=500,
@@ -172,6 +212,19 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
 
             raise
 
+    async def _record(self, request: Request, **log_kwargs):
+        """打开独立的异步会话，从认证上下文解析用户并记录操作日志"""
+        async with AsyncSessionLocal() as db:
+            # 复用请求级认证上下文：若依赖项已加载用户则不再查询
+            user_id, username = None, None
+            context = getattr(request.state, "auth", None)
+            if context is not None:
+                await context.decode()
+                await db.run_sync(context.get_user)
+                user_id, username = context.user_id, context.username
+
+            await self._log_operation(db=db, user_id=user_id, username=username, **log_kwargs)
+
     def _should_skip_logging(self, request: Request) -> bool:
         """判断是否跳过日志记录"""
         path = request.url.path
@@ -247,25 +300,13 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
 
     def _get_client_ip(self, request: Request) -> str:
         """获取客户端IP地址"""
-        # 尝试从各种头部获取真实IP
-        forwarded_for = request.headers.get("x-forwarded-for")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-
-        real_ip = request.headers.get("x-real-ip")
-        if real_ip:
-            return real_ip
-
-        # 从客户端地址获取
-        if hasattr(request, 'client') and request.client:
-            return request.client.host
-
-        return "unknown"
+        return get_client_ip(request)
 
-    def _log_operation(
+    async def _log_operation(
         self,
-        db: Session,
-        user: Optional[User],
+        db: AsyncSession,
+        user_id: Optional[int],
+        username: Optional[str],
         method: str,
         path: str,
         status_code: int,
@@ -287,7 +328,7 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
 
             # 创建日志记录
             log_entry = OperationLog(
-                user_id=user.id if user else None,
+                user_id=user_id,
                 action=action,
                 resource=resource,
                 resource_id=resource_id,
@@ -300,14 +341,14 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
 
             # 保存到数据库
             db.add(log_entry)
-            db.commit()
+            await db.commit()
 
-            logger.info(f"记录操作日志: {action} {resource} - 用户: {user.username if user else '匿名'}")
+            logger.info(f"记录操作日志: {action} {resource} - 用户: {username or '匿名'}")
 
         except Exception as e:
             logger.error(f"记录操作日志失败: {str(e)}")
             try:
-                db.rollback()
+                await db.rollback()
             except Exception:
                 pass
 
@@ -0,0 +1,32 @@
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from ..core.config import settings
+from ..core.query_stats import start_query_stats
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """
+    SQL语句统计中间件
+
+    统计请求处理期间执行的SQL语句数与数据库耗时，写入 X-DB-Queries 与
+    Server-Timing 响应头；语句数超过 SQL_QUERY_WARN_THRESHOLD 时记录警告。
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        stats = start_query_stats()
+        response = await call_next(request)
+
+        response.headers["X-DB-Queries"] = str(stats.count)
+        response.headers["Server-Timing"] = f'db;dur={stats.duration_ms};desc="{stats.count} queries"'
+
+        threshold = settings.SQL_QUERY_WARN_THRESHOLD
+        if threshold > 0 and stats.count > threshold:
+            logger.warning(
+                f"请求执行的SQL语句过多: {request.method} {request.url.path} - "
+                f"{stats.count}条语句, 耗时{stats.duration_ms}ms (阈值: {threshold})"
+            )
+
+        return response
@@ -10,6 +10,10 @@ from .user_role import UserRole
 from .role_permission import RolePermission
 from .user import User
 from .operation_log import OperationLog
+from .system_setting import SystemSetting
+from .revoked_token import RevokedToken
+from .user_session import UserSession
+from .user_tag import UserTag
 
 # 最后导入所有模型到 __all__ 列表
 __all__ = [
@@ -19,5 +23,9 @@ __all__ = [
     "UserRole",
     "RolePermission",
     "User",
-    "OperationLog"
+    "OperationLog",
+    "SystemSetting",
+    "RevokedToken",
+    "UserSession",
+    "UserTag"
 ]
\ No newline at end of file
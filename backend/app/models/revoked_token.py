@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, DateTime, Index
+
+from .base import BaseModel
+
+class RevokedToken(BaseModel):
+    """令牌吊销记录
+
+    jti 不为空时吊销单个令牌；jti 为空时吊销该用户在 revoked_before 之前签发的全部令牌。
+    """
+    __tablename__ = "revoked_tokens"
+
+    __table_args__ = (
+        Index('idx_revoked_token_user_id', 'user_id'),
+        Index('idx_revoked_token_expires_at', 'expires_at'),
+        # 禁止复用已删除的ID，进程按ID增量同步吊销记录
+        {'sqlite_autoincrement': True},
+    )
+
+    jti = Column(String(64), unique=True, index=True, nullable=True, comment="令牌ID")
+    user_id = Column(Integer, nullable=True, comment="用户ID")
+    revoked_before = Column(DateTime, nullable=True, comment="吊销此时间之前签发的令牌")
+    expires_at = Column(DateTime, nullable=False, comment="原令牌过期时间，过后可清理")
+
+    def __repr__(self):
+        return f"<RevokedToken(jti='{self.jti}', user_id={self.user_id})>"
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Text
+
+from .base import BaseModel
+
+class SystemSetting(BaseModel):
+    """系统键值配置模型"""
+    __tablename__ = "system_settings"
+
+    key = Column(String(100), unique=True, index=True, nullable=False, comment="配置键")
+    value = Column(Text, comment="配置值")
+
+    def __repr__(self):
+        return f"<SystemSetting(key='{self.key}', value='{self.value}')>"
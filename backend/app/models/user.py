@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from typing import List, TYPE_CHECKING
@@ -9,11 +9,20 @@ from .base import BaseModel
 if TYPE_CHECKING:
     from .user_role import UserRole
     from .operation_log import OperationLog
+    from .user_tag import UserTag
 
 class User(BaseModel):
     """用户模型"""
     __tablename__ = "users"
 
+    # 状态筛选索引，以及与列表排序字段匹配的复合索引（排序键 + id，用于分页定位）
+    __table_args__ = (
+        Index('idx_user_is_active', 'is_active'),
+        Index('idx_user_full_name_id', 'full_name', 'id'),
+        Index('idx_user_last_login_id', 'last_login', 'id'),
+        Index('idx_user_created_at_id', 'created_at', 'id'),
+    )
+
     username = Column(String(50), unique=True, index=True, nullable=False, comment="用户名")
     email = Column(String(100), unique=True, index=True, nullable=False, comment="邮箱")
     password_hash = Column(String(255), nullable=False, comment="密码哈希")
@@ -21,10 +30,12 @@ class User(BaseModel):
     avatar = Column(String(255), comment="头像URL")
     is_superuser = Column(Boolean, default=False, comment="是否超级用户")
     last_login = Column(DateTime(timezone=True), comment="最后登录时间")
+    department = Column(String(100), index=True, comment="部门")
 
     # 关系定义
     user_roles = relationship("UserRole", back_populates="user", cascade="all, delete-orphan")
     operation_logs = relationship("OperationLog", back_populates="user")
+    user_tags = relationship("UserTag", back_populates="user", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<User(username='{self.username}', email='{self.email}')>"
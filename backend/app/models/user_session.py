@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
+
+from .base import BaseModel
+
+class UserSession(BaseModel):
+    """服务端会话模型（AUTH_TOKEN_MODE=session 且开启持久化时使用）"""
+    __tablename__ = "user_sessions"
+
+    __table_args__ = (
+        Index('idx_user_session_user_id', 'user_id'),
+        Index('idx_user_session_expires_at', 'expires_at'),
+    )
+
+    session_hash = Column(String(64), unique=True, index=True, nullable=False, comment="会话令牌的SHA-256摘要")
+    user_id = Column(Integer, nullable=True, comment="用户ID")
+    claims = Column(Text, nullable=False, comment="会话声明(JSON)")
+    expires_at = Column(DateTime, nullable=False, comment="过期时间")
+    last_seen_at = Column(DateTime, nullable=False, comment="最近访问时间")
+
+    def __repr__(self):
+        return f"<UserSession(user_id={self.user_id}, expires_at='{self.expires_at}')>"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from .base import BaseModel
+
+class UserTag(BaseModel):
+    """用户标签表"""
+    __tablename__ = "user_tags"
+    
+    # 按标签筛选用户时使用 (tag, user_id) 索引
+    __table_args__ = (
+        Index('idx_user_tag_user_tag', 'user_id', 'tag', unique=True),
+        Index('idx_user_tag_tag_user', 'tag', 'user_id'),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, comment="用户ID")
+    tag = Column(String(50), nullable=False, comment="标签")
+
+    # 关系
+    user = relationship("User", back_populates="user_tags")
+
+    def __repr__(self):
+        return f"<UserTag(user_id={self.user_id}, tag='{self.tag}')>"
@@ -1,20 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from ..core.database import get_db
+from ..core.database import get_async_db
 from ..models.user import User
-from ..models.operation_log import OperationLog
-from ..utils.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..core.config import settings
 from ..utils.logger import get_logger
 from ..services.user_service import UserService, AuthService
 from ..core.security import get_current_user
 from ..utils.exceptions import service_exception_handler
 from ..schemas.base import BaseResponse
 from ..schemas.auth import LoginRequest, RegisterRequest, ForgotPasswordRequest, AuthResponse
-from ..core.security import create_refresh_token, verify_token
+from ..core.security import create_access_token, create_refresh_token, verify_token, decode_token, get_auth_context
+from ..core.token_revocation import token_revocations
+from ..core.permission_claims import get_permission_version
+from ..middleware.audit_log import get_client_ip
+from ..utils.rate_limit import auth_throttle
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -25,7 +29,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login-json")
 @router.post("/login-json", response_model=BaseResponse)
 async def login_json(
     login_data: LoginRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     request: Request = None
 ):
     """JSON格式用户登录"""
@@ -35,9 +39,18 @@ async def login_json(
         password = login_data.password
         remember = login_data.remember or False
         
-        # 验证用户凭据
-        user = AuthService.verify_user_credentials_by_email(db, email, password)
-        if not user:
+        ip_address = get_client_ip(request) if request else "unknown"
+        user_agent = request.headers.get("user-agent", "") if request else ""
+        
+        # 限流检查，在校验密码之前拒绝暴力尝试
+        auth_throttle.check("login", ip_address, email)
+        
+        # 先取得全局权限版本号，令牌中的权限声明以此版本标记
+        permission_version = await db.run_sync(get_permission_version)
+        
+        # 验证用户凭据并记录登录（单次查询、单个事务）
+        login_info = await AuthService.login(db, email, password, ip_address, user_agent)
+        if not login_info:
             logger.warning(f"登录失败: 邮箱或密码错误 - {email}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,34 +58,38 @@ async def login_json(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # 更新最后登录时间
-        UserService.update_last_login(db, user)
-        
-        # 获取用户角色和权限
-        user_roles, user_permissions = UserService.get_user_roles_and_permissions(db, user)
+        user_roles = login_info["roles"]
+        user_permissions = login_info["permissions"]
         
         # 创建访问令牌
-        token_expire_minutes = ACCESS_TOKEN_EXPIRE_MINUTES
+        token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
         if remember:
             token_expire_minutes = 7 * 24 * 60  # 7天
         
         access_token_expires = timedelta(minutes=token_expire_minutes)
-        access_token = create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
-        )
+        access_token = await db.run_sync(lambda session: create_access_token(
+            data={"sub": login_info["username"]},
+            expires_delta=access_token_expires,
+            roles=user_roles,
+            permissions=user_permissions,
+            is_superuser=login_info["is_superuser"],
+            user_id=login_info["id"],
+            permission_version=permission_version,
+            db=session
+        ))
 
         # 创建刷新令牌
-        refresh_token = create_refresh_token(user.id)
+        refresh_token = create_refresh_token(login_info["id"])
         
         # 构建响应数据
         user_data = {
-            "id": f"USR-{user.id}",
-            "name": user.full_name or user.username,
-            "email": user.email,
+            "id": f"USR-{login_info['id']}",
+            "name": login_info["full_name"] or login_info["username"],
+            "email": login_info["email"],
             "role": user_roles[0] if user_roles else "user",  # 主要角色
             "permissions": user_permissions,
-            "avatar": user.avatar,
-            "lastLogin": user.last_login.isoformat() + "Z" if user.last_login else None
+            "avatar": login_info["avatar"],
+            "lastLogin": login_info["last_login"].isoformat() + "Z"
         }
         
         response_data = {
@@ -82,28 +99,7 @@ async def login_json(
             "user": user_data
         }
         
-        logger.info(f"用户登录成功: {user.username}")
-
-        # 手动记录登录操作日志（重要的安全事件）
-        try:
-            ip_address = request.client.host if request and hasattr(request, 'client') else "unknown"
-            user_agent = request.headers.get("user-agent", "") if request else ""
-
-            login_log = OperationLog(
-                user_id=user.id,
-                action="用户登录",
-                resource="auth",
-                description="用户登录成功(JSON)",
-                ip_address=ip_address,
-                user_agent=user_agent,
-                request_data={"email": login_data.email},
-                response_data={"login_success": True}
-            )
-            db.add(login_log)
-            db.commit()
-        except Exception as e:
-            logger.warning(f"记录登录日志失败: {str(e)}")
-            db.rollback()
+        logger.info(f"用户登录成功: {login_info['username']}")
 
         return BaseResponse(
             success=True,
@@ -118,7 +114,8 @@ async def login_json(
 @router.post("/register", response_model=BaseResponse)
 async def register(
     register_data: RegisterRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """用户注册"""
 
@@ -127,9 +124,11 @@ async def register(
         email = register_data.email
         password = register_data.password
 
-        
+        # 限流检查，在生成密码哈希之前拒绝批量注册
+        auth_throttle.check("register", get_client_ip(request), email)
+
         # 检查邮箱是否已存在
-        existing_user = UserService.get_user_by_email(db, email)
+        existing_user = await UserService.get_user_by_email(db, email)
         if existing_user:
             logger.warning(f"注册失败: 邮箱已存在 - {email}")
             raise HTTPException(
@@ -139,18 +138,18 @@ async def register(
 
         # 检查用户名是否已存在（使用邮箱前缀作为用户名）
         username = email.split("@")[0]
-        existing_username = UserService.get_user_by_username(db, username)
+        existing_username = await UserService.get_user_by_username(db, username)
         if existing_username:
             # 如果用户名已存在，添加随机数
             import random
             username = f"{username}{random.randint(1000, 9999)}"
 
         # 创建新用户
-        new_user = UserService.create_user(db, username, email, password, name)
+        new_user = await UserService.create_user(db, username, email, password, name)
         logger.info(f"用户注册成功: {email}")
 
         # 为新用户分配默认角色
-        UserService.assign_default_role(db, new_user)
+        await UserService.assign_default_role(db, new_user)
         logger.info(f"✅ 新用户 {new_user.username} 已分配默认角色")
 
         return BaseResponse(
@@ -169,7 +168,8 @@ async def register(
 @router.post("/forgot-password", response_model=BaseResponse)
 async def forgot_password(
     forgot_data: ForgotPasswordRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """找回密码"""
     logger.info(f"密码重置请求: {forgot_data.email}")
@@ -177,8 +177,11 @@ async def forgot_password(
     try:
         email = forgot_data.email
         
+        # 限流检查
+        auth_throttle.check("forgot-password", get_client_ip(request), email)
+        
         # 查找用户
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User.id).where(User.email == email))
         if not user:
             # 为了安全，即使用户不存在也返回成功
             logger.info(f"密码重置请求: 邮箱不存在 - {email}")
@@ -205,7 +208,7 @@ async def forgot_password(
 @router.post("/refresh", response_model=BaseResponse)
 async def refresh_token(
     refresh_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """刷新访问令牌"""
     try:
@@ -221,7 +224,7 @@ async def refresh_token(
 
         # 验证刷新令牌
         logger.info(f"🔍 开始验证刷新令牌")
-        user = verify_token(refresh_token, db, "refresh")
+        user = await db.run_sync(lambda session: verify_token(refresh_token, session, "refresh"))
         if not user:
             logger.warning(f"❌ 刷新令牌验证失败")
             raise HTTPException(
@@ -231,18 +234,27 @@ async def refresh_token(
 
         logger.info(f"✅ 刷新令牌验证成功，用户: {user.username}")
 
-        # 创建新的访问令牌
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        new_access_token = create_access_token(
-            data={"sub": str(user.id)}, expires_delta=access_token_expires
-        )
+        # 创建新的访问令牌，嵌入最新的角色和权限
+        permission_version = await db.run_sync(get_permission_version)
+        user_roles, user_permissions = await UserService.get_user_roles_and_permissions(db, user)
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        new_access_token = await db.run_sync(lambda session: create_access_token(
+            data={"sub": str(user.id)},
+            expires_delta=access_token_expires,
+            roles=user_roles,
+            permissions=user_permissions,
+            is_superuser=user.is_superuser,
+            user_id=user.id,
+            permission_version=permission_version,
+            db=session
+        ))
 
         logger.info(f"✅ 新访问令牌已创建: {new_access_token[:30]}..." if len(new_access_token) > 30 else f"令牌: {new_access_token}")
         logger.info(f"✅ 新访问令牌验证测试: {new_access_token[:10]}...")
 
         # 简单验证新令牌是否有效
         try:
-            test_user = verify_token(new_access_token, db, "access")
+            test_user = await db.run_sync(lambda session: verify_token(new_access_token, session, "access"))
             logger.info(f"✅ 新访问令牌自验证成功: {test_user.username if test_user else 'None'}")
         except Exception as e:
             logger.error(f"❌ 新访问令牌自验证失败: {e}")
@@ -260,4 +272,55 @@ async def refresh_token(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="令牌刷新失败"
-        )
\ No newline at end of file
+        )
+
+@router.post("/logout", response_model=BaseResponse)
+async def logout(
+    request: Request,
+    logout_data: Optional[Dict[str, Any]] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """退出登录，吊销当前访问令牌及请求体中的刷新令牌"""
+    try:
+        await db.run_sync(token_revocations.revoke_token, get_auth_context(request).payload, current_user.id)
+
+        refresh_token = (logout_data or {}).get("refresh_token")
+        if refresh_token:
+            refresh_payload = decode_token(refresh_token, "refresh")
+            # 只吊销属于当前用户的刷新令牌
+            if refresh_payload and refresh_payload.get("sub") == str(current_user.id):
+                await db.run_sync(token_revocations.revoke_token, refresh_payload, current_user.id)
+
+        logger.info(f"用户退出登录: {current_user.username}")
+
+        return BaseResponse(
+            success=True,
+            message="已退出登录",
+            data=None
+        )
+
+    except Exception as e:
+        logger.error(f"退出登录失败: {str(e)}")
+        raise service_exception_handler(e)
+
+@router.post("/logout-all", response_model=BaseResponse)
+async def logout_all(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """退出所有设备，吊销当前用户已签发的全部令牌"""
+    try:
+        await db.run_sync(token_revocations.revoke_all_for_user, current_user.id)
+
+        logger.info(f"用户退出所有设备: {current_user.username}")
+
+        return BaseResponse(
+            success=True,
+            message="已退出所有设备",
+            data=None
+        )
+
+    except Exception as e:
+        logger.error(f"退出所有设备失败: {str(e)}")
+        raise service_exception_handler(e)
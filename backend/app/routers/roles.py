@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional
 
-from ..core.database import get_db
+from ..core.database import get_async_db, get_async_read_db
 from ..utils.logger import get_logger
 from ..services.role_management_service import RoleManagementService
 from ..utils.exceptions import service_exception_handler
@@ -14,12 +14,16 @@ logger = get_logger(__name__)
 
 @router.get("/", response_model=BaseResponse)
 @router.get("", response_model=BaseResponse)  # 支持不带斜杠
-async def get_roles(db: Session = Depends(get_db)):
+async def get_roles(
+    include: Optional[str] = Query(None, description="附加字段，逗号分隔: members,permissions；不传时全部返回"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """获取角色列表"""
-    logger.info("获取角色列表")
+    logger.info(f"获取角色列表: include={include}")
     
     try:
-        result = RoleManagementService.get_roles_list(db)
+        fields = None if include is None else [field.strip() for field in include.split(",") if field.strip()]
+        result = await RoleManagementService.get_roles_list(db, fields)
         logger.info(f"获取角色列表成功: 共 {len(result)} 个角色")
         return BaseResponse(
             success=True,
@@ -35,13 +39,13 @@ async def get_roles(db: Session = Depends(get_db)):
 @router.get("/{role_id}/", response_model=BaseResponse)  # 支持带斜杠
 async def get_role_detail(
     role_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取角色详情"""
     logger.info(f"获取角色详情: {role_id}")
     
     try:
-        role_data = RoleManagementService.get_role_detail(db, role_id)
+        role_data = await RoleManagementService.get_role_detail(db, role_id)
         logger.info(f"获取角色详情成功: {role_data.get('displayName', role_id)}")
         return BaseResponse(
             success=True,
@@ -57,14 +61,14 @@ async def get_role_detail(
 async def update_role(
     role_id: str,
     role_data: RoleUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新角色信息"""
     logger.info(f"更新角色信息: {role_id}")
     
     try:
         role_dict = role_data.dict(exclude_unset=True)
-        role_data_result = RoleManagementService.update_role(db, role_id, role_dict)
+        role_data_result = await RoleManagementService.update_role(db, role_id, role_dict)
         logger.info(f"角色信息更新成功: {role_data_result.get('displayName')}")
         return BaseResponse(
             success=True,
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Optional
 
-from ..core.database import get_db
+from ..core.database import get_async_db, get_async_read_db
+from ..models.user import User
+from ..utils.permissions import require_permissions
 from ..utils.logger import get_logger
 from ..services.user_management_service import UserManagementService
+from ..core.user_suggest import user_suggest_index
 from ..utils.exceptions import service_exception_handler
 from ..schemas.base import BaseResponse, PaginatedResponse
 from ..schemas.user import UserCreate, UserUpdate, UserListResponse, UserDetailResponse
@@ -20,26 +23,32 @@ async def get_users(
     keyword: Optional[str] = Query(None, description="关键词搜索"),
     status: Optional[str] = Query("all", description="状态筛选"),
     role: Optional[str] = Query("all", description="角色筛选"),
-    tags: Optional[str] = Query(None, description="标签筛选"),
-    department: Optional[str] = Query(None, description="部门筛选"),
+    tags: Optional[str] = Query(None, description="标签筛选，多个以逗号分隔"),
+    department: Optional[str] = Query(None, description="部门筛选，多个以逗号分隔"),
     sorter: Optional[str] = Query(None, description="排序"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="分页游标（上次响应的 nextCursor/prevCursor），传入时忽略页码"),
+    withTotal: bool = Query(True, description="是否返回总数，无限滚动等场景可传 false 省去计数"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """获取用户列表"""
     logger.info(f"获取用户列表: page={page}, pageSize={pageSize}, keyword={keyword}")
     
     try:
-        result = UserManagementService.get_users_list(
+        result = await UserManagementService.get_users_list(
             db=db,
             page=page,
             page_size=pageSize,
             keyword=keyword,
             status=status,
             role=role,
-            sorter=sorter
+            sorter=sorter,
+            cursor=cursor,
+            with_total=withTotal,
+            department=department,
+            tags=tags
         )
         
-        logger.info(f"获取用户列表成功: 共 {result['total']} 条记录")
+        logger.info(f"获取用户列表成功: 本页 {len(result['items'])} 条, 共 {result['total']} 条记录")
         return PaginatedResponse(
             success=True,
             message="获取用户列表成功",
@@ -50,17 +59,48 @@ async def get_users(
         logger.error(f"获取用户列表失败: {str(e)}")
         raise service_exception_handler(e)
 
+@router.get("/facets", response_model=BaseResponse)
+async def get_user_facets(
+    keyword: Optional[str] = Query(None, description="关键词搜索"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """获取用户列表筛选项（角色、状态）的计数"""
+    try:
+        result = await UserManagementService.get_users_facets(db, keyword)
+        return BaseResponse(
+            success=True,
+            message="获取用户分面计数成功",
+            data=result
+        )
+        
+    except Exception as e:
+        logger.error(f"获取用户分面计数失败: {str(e)}")
+        raise service_exception_handler(e)
+
+@router.get("/suggest", response_model=BaseResponse)
+async def suggest_users(
+    q: str = Query(..., min_length=1, description="用户名或邮箱前缀"),
+    limit: int = Query(10, ge=1, le=50, description="最多返回数量"),
+    current_user: User = Depends(require_permissions(["users:view"]))
+):
+    """按用户名或邮箱前缀联想用户（内存索引，不查询数据库）"""
+    return BaseResponse(
+        success=True,
+        message="获取联想用户成功",
+        data=user_suggest_index.search(q, limit)
+    )
+
 @router.get("/{user_id}", response_model=BaseResponse)
 @router.get("/{user_id}/", response_model=BaseResponse)  # 支持带斜杠
 async def get_user_detail(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """获取用户详情"""
     logger.info(f"获取用户详情: {user_id}")
     
     try:
-        user_data = UserManagementService.get_user_detail(db, user_id)
+        user_data = await UserManagementService.get_user_detail(db, user_id)
         logger.info(f"获取用户详情成功: {user_data.get('name', user_id)}")
         return BaseResponse(
             success=True,
@@ -73,9 +113,10 @@ async def get_user_detail(
         raise service_exception_handler(e)
 
 @router.post("/", response_model=BaseResponse)
+@router.post("", response_model=BaseResponse)  # 同时支持不带斜杠
 async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建用户"""
     logger.info(f"创建用户: {user_data.email}")
@@ -88,7 +129,7 @@ async def create_user(
         user_dict["avatar"] = user_dict.pop("avatar", None)
         user_dict["role"] = user_dict.pop("role", None)
         
-        user_data_result = UserManagementService.create_user(db, user_dict)
+        user_data_result = await UserManagementService.create_user(db, user_dict)
         logger.info(f"用户创建成功: {user_data_result.get('email')}")
         return BaseResponse(
             success=True,
@@ -105,14 +146,14 @@ async def create_user(
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新用户信息"""
     logger.info(f"更新用户信息: {user_id}")
     
     try:
         user_dict = user_data.dict(exclude_unset=True)
-        user_data_result = UserManagementService.update_user(db, user_id, user_dict)
+        user_data_result = await UserManagementService.update_user(db, user_id, user_dict)
         logger.info(f"用户信息更新成功: {user_data_result.get('email')}")
         return BaseResponse(
             success=True,
@@ -129,13 +170,13 @@ async def update_user(
 async def update_user_status(
     user_id: str,
     status_data: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新用户状态"""
     logger.info(f"更新用户状态: {user_id}")
     
     try:
-        result = UserManagementService.update_user_status(db, user_id, status_data)
+        result = await UserManagementService.update_user_status(db, user_id, status_data)
         logger.info(f"用户状态更新成功: {result.get('id')}")
         return BaseResponse(
             success=True,
@@ -147,17 +188,40 @@ async def update_user_status(
         logger.error(f"更新用户状态失败: {str(e)}")
         raise service_exception_handler(e)
 
+@router.post("/{user_id}/revoke-tokens", response_model=BaseResponse)
+@router.post("/{user_id}/revoke-tokens/", response_model=BaseResponse)  # 支持带斜杠
+async def revoke_user_tokens(
+    user_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_permissions(["users:edit"]))
+):
+    """吊销用户的全部令牌（强制下线）"""
+    logger.info(f"吊销用户令牌: {user_id}, 操作人: {current_user.username}")
+    
+    try:
+        result = await UserManagementService.revoke_user_tokens(db, user_id)
+        logger.info(f"用户令牌吊销成功: {user_id}")
+        return BaseResponse(
+            success=True,
+            message="用户令牌已吊销",
+            data=result
+        )
+        
+    except Exception as e:
+        logger.error(f"吊销用户令牌失败: {str(e)}")
+        raise service_exception_handler(e)
+
 @router.delete("/{user_id}", response_model=BaseResponse)
 @router.delete("/{user_id}/", response_model=BaseResponse)  # 支持带斜杠
 async def delete_user(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除用户"""
     logger.info(f"删除用户: {user_id}")
     
     try:
-        result = UserManagementService.delete_user(db, user_id)
+        result = await UserManagementService.delete_user(db, user_id)
         logger.info(f"用户删除成功: {user_id}")
         return BaseResponse(
             success=True,
@@ -173,14 +237,14 @@ async def delete_user(
 @router.post("/bulk-delete/", response_model=BaseResponse)  # 支持带斜杠
 async def bulk_delete_users(
     delete_data: Dict[str, Any],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """批量删除用户"""
     logger.info(f"批量删除用户: {delete_data.get('ids')}")
     
     try:
         ids = delete_data.get("ids", [])
-        result = UserManagementService.bulk_delete_users(db, ids)
+        result = await UserManagementService.bulk_delete_users(db, ids)
         logger.info(f"批量删除用户成功: 共删除 {result.get('deleted', 0)} 个用户")
         return BaseResponse(
             success=True,
@@ -13,7 +13,7 @@ class RoleCreate(RoleBase):
 
 class RoleUpdate(RoleBase):
     """角色更新模型"""
-    pass
+    permissions: Optional[List[str]] = Field(None, description="权限列表")
 
 class RoleResponse(RoleBase):
     """角色响应模型"""
@@ -12,6 +12,8 @@ class UserCreate(UserBase):
     """用户创建模型"""
     password: str = Field(..., min_length=6, max_length=100, description="用户密码")
     role: Optional[str] = Field(None, description="用户角色")
+    department: Optional[str] = Field(None, max_length=100, description="部门")
+    tags: Optional[List[str]] = Field(None, description="标签")
 
     @validator('password')
     def validate_password(cls, v):
@@ -26,6 +28,8 @@ class UserUpdate(BaseModel):
     password: Optional[str] = Field(None, min_length=6, max_length=100, description="用户密码")
     avatar: Optional[str] = Field(None, max_length=255, description="头像URL")
     role: Optional[str] = Field(None, description="用户角色")
+    department: Optional[str] = Field(None, max_length=100, description="部门")
+    tags: Optional[List[str]] = Field(None, description="标签")
 
     @validator('password')
     def validate_password(cls, v):
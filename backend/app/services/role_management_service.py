@@ -1,6 +1,9 @@
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Dict, Any, Iterable, Optional
 from datetime import datetime
+from itertools import combinations
 
 from ..models.role import Role
 from ..models.user_role import UserRole
@@ -8,50 +11,90 @@ from ..models.role_permission import RolePermission
 from ..models.permission import Permission
 from ..utils.logger import get_logger
 from ..utils.exceptions import ValidationError, NotFoundError, DatabaseError
-from ..utils.cache import cache
+from ..utils.cache import cache, user_count_cache
+from ..core.permission_claims import bump_permission_version
+from ..core.permission_matrix import permission_matrix, is_permission_pattern
 
 logger = get_logger(__name__)
 
 class RoleManagementService:
     """角色管理服务"""
     
+    # 角色列表可选的附加字段
+    ROLE_LIST_INCLUDES = ("members", "permissions")
+    
+    @staticmethod
+    def _roles_list_cache_key(include: Iterable[str]) -> str:
+        """角色列表缓存键（按附加字段区分）"""
+        return "roles_list:" + ",".join(sorted(include))
+    
+    @staticmethod
+    def _invalidate_roles_list_cache() -> None:
+        """清除所有附加字段组合的角色列表缓存"""
+        fields = RoleManagementService.ROLE_LIST_INCLUDES
+        for size in range(len(fields) + 1):
+            for include in combinations(fields, size):
+                cache.delete(RoleManagementService._roles_list_cache_key(include))
+    
     @staticmethod
-    def get_roles_list(db: Session) -> List[Dict[str, Any]]:
-        """获取角色列表"""
+    async def get_roles_list(db: AsyncSession, include: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        获取角色列表
+        
+        Args:
+            db: 数据库会话
+            include: 附加字段（members: 成员数，permissions: 权限名称），为 None 时全部返回
+        """
         try:
+            include = set(RoleManagementService.ROLE_LIST_INCLUDES if include is None else include)
+            unknown = include.difference(RoleManagementService.ROLE_LIST_INCLUDES)
+            if unknown:
+                raise ValidationError(f"不支持的附加字段: {', '.join(sorted(unknown))}", "include")
+            
             # 尝试从缓存获取
-            cache_key = "roles_list"
+            cache_key = RoleManagementService._roles_list_cache_key(include)
             cached_result = cache.get(cache_key)
             if cached_result is not None:
                 logger.debug("从缓存获取角色列表")
                 return cached_result
             
             # 查询所有角色
-            roles = db.query(Role).all()
+            roles = (await db.execute(
+                select(Role.id, Role.name, Role.description).order_by(Role.id)
+            )).all()
+            
+            # 一次分组查询获取所有角色的成员数量
+            members_counts: Dict[int, int] = {}
+            if "members" in include:
+                members_counts = dict((await db.execute(
+                    select(UserRole.role_id, func.count()).group_by(UserRole.role_id)
+                )).all())
+            
+            # 一次关联查询获取所有角色的权限名称
+            permissions_by_role: Dict[int, List[str]] = {}
+            if "permissions" in include:
+                rows = await db.execute(
+                    select(RolePermission.role_id, Permission.name)
+                    .join(Permission, RolePermission.permission_id == Permission.id)
+                    .order_by(RolePermission.role_id, RolePermission.id)
+                )
+                for role_id, permission_name in rows:
+                    permissions_by_role.setdefault(role_id, []).append(permission_name)
             
             # 构建返回数据
             result = []
             for role in roles:
-                # 获取角色成员数量
-                members_count = db.query(UserRole).filter(UserRole.role_id == role.id).count()
-                
-                # 获取角色权限
-                permissions = []
-                try:
-                    for role_permission in role.role_permissions:
-                        permissions.append(role_permission.permission.name)
-                except Exception as e:
-                    logger.warning(f"获取角色权限失败: {str(e)}")
-                
                 # 构建角色数据
                 role_data = {
                     "id": f"ROLE-{role.id}",
                     "displayName": role.name,
                     "description": role.description or "",
-                    "members": members_count,
-                    "permissions": permissions,
                     "status": "active"  # 模拟数据，实际应从角色表获取
                 }
+                if "members" in include:
+                    role_data["members"] = members_counts.get(role.id, 0)
+                if "permissions" in include:
+                    role_data["permissions"] = permissions_by_role.get(role.id, [])
                 
                 result.append(role_data)
             
@@ -60,12 +103,14 @@ class RoleManagementService:
             
             return result
             
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"获取角色列表失败: {str(e)}")
             raise DatabaseError(f"获取角色列表失败: {str(e)}")
     
     @staticmethod
-    def get_role_detail(db: Session, role_id: str) -> Dict[str, Any]:
+    async def get_role_detail(db: AsyncSession, role_id: str) -> Dict[str, Any]:
         """获取角色详情"""
         try:
             # 验证参数
@@ -89,8 +134,13 @@ class RoleManagementService:
                 logger.debug(f"从缓存获取角色详情: {role_id}")
                 return cached_result
             
-            # 查询角色
-            role = db.query(Role).filter(Role.id == role_id_int).first()
+            # 查询角色（权限关联随角色一并加载）
+            role = (await db.execute(
+                select(Role)
+                .options(selectinload(Role.role_permissions).selectinload(RolePermission.permission))
+                .where(Role.id == role_id_int)
+                .execution_options(populate_existing=True)
+            )).scalar_one_or_none()
             if not role:
                 raise NotFoundError("角色", role_id)
             
@@ -125,7 +175,7 @@ class RoleManagementService:
             raise DatabaseError(f"获取角色详情失败: {str(e)}")
     
     @staticmethod
-    def update_role(db: Session, role_id: str, role_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_role(db: AsyncSession, role_id: str, role_data: Dict[str, Any]) -> Dict[str, Any]:
         """更新角色信息"""
         try:
             # 验证参数
@@ -143,7 +193,7 @@ class RoleManagementService:
                 raise ValidationError("角色ID格式不正确", "role_id")
             
             # 查询角色
-            role = db.query(Role).filter(Role.id == role_id_int).first()
+            role = await db.scalar(select(Role).where(Role.id == role_id_int))
             if not role:
                 raise NotFoundError("角色", role_id)
             
@@ -158,30 +208,44 @@ class RoleManagementService:
             
             # 更新最后修改时间
             role.updated_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
             
             # 更新权限关联
+            assigned_permissions = None
             if "permissions" in role_data:
                 # 删除现有权限关联
-                db.query(RolePermission).filter(RolePermission.role_id == role.id).delete()
+                await db.execute(delete(RolePermission).where(RolePermission.role_id == role.id))
                 
                 # 添加新权限关联
+                assigned_permissions = []
                 permissions = role_data["permissions"]
                 if permissions:
                     for permission_name in permissions:
-                        permission = db.query(Permission).filter(Permission.name == permission_name).first()
+                        permission = await db.scalar(select(Permission).where(Permission.name == permission_name))
+                        if not permission and is_permission_pattern(permission_name):
+                            # 通配授权模式（如 users:*）首次使用时登记为权限
+                            permission = await RoleManagementService._create_pattern_permission(db, permission_name)
                         if permission:
                             role_permission = RolePermission(role_id=role.id, permission_id=permission.id)
                             db.add(role_permission)
+                            assigned_permissions.append(permission.name)
                 
-                db.commit()
+                await db.commit()
+            
+            # 增量更新权限矩阵
+            permission_matrix.set_role(role.id, role.name, assigned_permissions)
             
             # 清除相关缓存
             cache.delete(f"role_detail_{role_id}")
-            cache.delete("roles_list")
+            RoleManagementService._invalidate_roles_list_cache()
+            # 用户分面计数以角色名称为键，列表总数缓存键含角色筛选
+            user_count_cache.invalidate()
+            
+            # 角色名称或权限变化后，令牌中的权限声明需要刷新
+            await db.run_sync(bump_permission_version)
             
             # 返回更新后的角色数据
-            return RoleManagementService.get_role_detail(db, f"ROLE-{role.id}")
+            return await RoleManagementService.get_role_detail(db, f"ROLE-{role.id}")
             
         except ValidationError:
             raise
@@ -189,5 +253,19 @@ class RoleManagementService:
             raise
         except Exception as e:
             logger.error(f"更新角色信息失败: {str(e)}")
-            db.rollback()
-            raise DatabaseError(f"更新角色信息失败: {str(e)}")
\ No newline at end of file
+            await db.rollback()
+            raise DatabaseError(f"更新角色信息失败: {str(e)}")
+    
+    @staticmethod
+    async def _create_pattern_permission(db: AsyncSession, pattern: str) -> Permission:
+        """登记通配授权模式"""
+        resource, _, action = pattern.partition(":")
+        permission = Permission(
+            name=pattern,
+            resource=resource,
+            action=action or "*",
+            description=f"通配权限: {pattern}"
+        )
+        db.add(permission)
+        await db.flush()
+        return permission
@@ -1,5 +1,7 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import DateTime, String, and_, or_, case, select, delete, func, false, literal, true, type_coerce, union_all, exists
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import json
@@ -7,26 +9,67 @@ import json
 from ..models.user import User
 from ..models.user_role import UserRole
 from ..models.role import Role
-from ..core.security import get_password_hash
+from ..models.user_tag import UserTag
+from ..core.database import get_primary_bind
+from ..core.security import get_password_hash_async
 from ..utils.logger import get_logger
+from ..utils.cache import principal_cache, user_count_cache
+from ..core.permission_claims import bump_permission_version
+from ..core.permission_matrix import permission_matrix
+from ..core.token_revocation import token_revocations
+from ..core.user_search import user_keyword_filter
+from ..core.user_suggest import user_suggest_index
 from ..utils.exceptions import ValidationError, NotFoundError, ConflictError, DatabaseError
+from ..utils.pagination import CURSOR_NEXT, CURSOR_PREV, decode_cursor, encode_cursor, keyset_after, keyset_order_by, parse_cursor_value, supports_row_values
 
 logger = get_logger(__name__)
 
 class UserManagementService:
     """用户管理服务"""
     
+    # 用户列表查询的列（只取列表需要的列，不加载完整的用户实体）
+    LIST_COLUMNS = (
+        User.id,
+        User.username,
+        User.email,
+        User.full_name,
+        User.avatar,
+        User.last_login,
+        User.department,
+        User.is_active
+    )
+
+    # 支持排序的字段
+    SORT_FIELDS = {
+        "name": User.full_name,
+        "email": User.email,
+        "lastLogin": User.last_login,
+        "createdAt": User.created_at
+    }
+
     @staticmethod
-    def get_users_list(
-        db: Session,
+    async def get_users_list(
+        db: AsyncSession,
         page: int = 1,
         page_size: int = 10,
         keyword: Optional[str] = None,
         status: Optional[str] = "all",
         role: Optional[str] = "all",
-        sorter: Optional[str] = None
+        sorter: Optional[str] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+        department: Optional[str] = None,
+        tags: Optional[str] = None
     ) -> Dict[str, Any]:
-        """获取用户列表"""
+        """
+        获取用户列表
+
+        department 与 tags 为逗号分隔的多个值，分别匹配任一部门、拥有任一标签的用户。
+
+        传入 cursor 时按排序键与用户ID做键集分页，不再使用 page；
+        两种模式都会返回 nextCursor/prevCursor，可从页码模式切换到游标模式继续翻页。
+        总数按筛选条件缓存，with_total 为 False 时不计算总数（total 返回 None）。
+        """
         try:
             # 验证参数
             if page < 1:
@@ -36,62 +79,86 @@ class UserManagementService:
                 raise ValidationError("每页数量必须在1-100之间", "page_size")
             
             # 构建查询
-            query = db.query(User)
-            
-            # 关键词搜索
-            if keyword:
-                query = query.filter(
-                    or_(
-                        User.full_name.like(f"%{keyword}%"),
-                        User.email.like(f"%{keyword}%"),
-                        User.username.like(f"%{keyword}%")
-                    )
-                )
+            query = select(*UserManagementService.LIST_COLUMNS)
+            
+            # 关键词搜索（优先使用全文索引）
+            keyword_filter = user_keyword_filter(keyword) if keyword else None
+            if keyword_filter is not None:
+                query = query.where(keyword_filter)
             
             # 角色筛选
             if role != "all":
-                query = query.join(UserRole).join(Role).filter(Role.name == role)
+                query = query.join(UserRole).join(Role).where(Role.name == role)
+            
+            # 状态筛选
+            if status and status != "all":
+                if status not in ("active", "inactive"):
+                    raise ValidationError("状态筛选值不正确", "status")
+                query = query.where(UserManagementService._status_condition(status))
+            
+            # 部门筛选
+            departments = UserManagementService._split_values(department)
+            if departments:
+                query = query.where(User.department.in_(departments))
+            
+            # 标签筛选
+            tag_list = UserManagementService._split_values(tags)
+            if tag_list:
+                query = query.where(exists().where(UserTag.user_id == User.id, UserTag.tag.in_(tag_list)))
             
             # 排序处理
-            if sorter:
-                try:
-                    sorter_data = json.loads(sorter) if isinstance(sorter, str) else sorter
-                    field = sorter_data.get("field", "id")
-                    order = sorter_data.get("order", "ascend")
-                    
-                    # 映射字段名
-                    field_mapping = {
-                        "name": User.full_name,
-                        "email": User.email,
-                        "lastLogin": User.last_login,
-                        "createdAt": User.created_at
-                    }
-                    
-                    if field in field_mapping:
-                        if order == "descend":
-                            query = query.order_by(field_mapping[field].desc())
-                        else:
-                            query = query.order_by(field_mapping[field].asc())
-                except Exception as e:
-                    logger.warning(f"排序参数解析失败: {str(e)}")
-                    # 使用默认排序
-                    query = query.order_by(User.id)
+            field, descending = UserManagementService._parse_sorter(sorter)
+            sort_key = UserManagementService._sort_key(db, field)
+            
+            # 排序键随用户一并查询，用于生成游标
+            count_query = query
+            query = query.add_columns(sort_key.label("sort_key"))
+            
+            if cursor:
+                rows, next_cursor, prev_cursor = await UserManagementService._fetch_keyset_page(
+                    db, query, sort_key, field, descending, cursor, page_size
+                )
+                # 游标模式下无法从当前页推算总数
+                page_total = None
             else:
-                # 默认排序
-                query = query.order_by(User.id)
+                # 分页（多取一行判断是否还有下一页）
+                offset = (page - 1) * page_size
+                result = await db.execute(
+                    query.order_by(*keyset_order_by(sort_key, User.id, descending)).offset(offset).limit(page_size + 1)
+                )
+                rows = result.all()
+                has_more = len(rows) > page_size
+                rows = rows[:page_size]
+                next_cursor = UserManagementService._encode_position(rows[-1], field, descending, CURSOR_NEXT) \
+                    if has_more else None
+                prev_cursor = UserManagementService._encode_position(rows[0], field, descending, CURSOR_PREV) \
+                    if rows and page > 1 else None
+                # 最后一页可由偏移量直接得出总数，无需 COUNT
+                page_total = offset + len(rows) if not has_more and (rows or offset == 0) else None
             
             # 计算总数
-            total = query.count()
+            total = None
+            if with_total:
+                total = page_total
+                if total is None:
+                    total = await UserManagementService._count_users(
+                        db,
+                        count_query,
+                        UserManagementService._count_cache_key(keyword, status, role, departments, tag_list)
+                    )
             
-            # 分页
-            offset = (page - 1) * page_size
-            users = query.offset(offset).limit(page_size).all()
+            # 一次查询整页用户的角色ID，角色名称与权限由内存中的权限矩阵解析；标签同样按页批量查询
+            page_user_ids = [row.id for row in rows]
+            role_ids_by_user = await UserManagementService._get_role_ids_by_user(db, page_user_ids)
+            tags_by_user = await UserManagementService._get_tags_by_user(db, page_user_ids)
             
             # 构建返回数据
             items = []
-            for user in users:
+            for user in rows:
                 # 获取用户角色和权限
-                user_roles, user_permissions = UserManagementService._get_user_roles_and_permissions(user)
+                user_roles, user_permissions = UserManagementService._resolve_roles_and_permissions(
+                    role_ids_by_user.get(user.id, [])
+                )
                 
                 # 构建用户数据
                 user_data = {
@@ -100,11 +167,11 @@ class UserManagementService:
                     "email": user.email,
                     "role": user_roles[0] if user_roles else "user",
                     "roleName": user_roles[0] if user_roles else "普通用户",
-                    "department": "技术部",  # 模拟数据，实际应从用户表获取
-                    "status": "active",  # 模拟数据，实际应从用户表获取
+                    "department": user.department or "",
+                    "status": "active" if user.is_active else "inactive",
                     "lastLogin": user.last_login.isoformat() + "Z" if user.last_login else None,
                     "avatar": user.avatar,
-                    "tags": ["北京"],  # 模拟数据，实际应从用户表获取
+                    "tags": tags_by_user.get(user.id, []),
                     "permissions": user_permissions[:5]  # 只显示前5个权限
                 }
                 
@@ -113,8 +180,10 @@ class UserManagementService:
             result = {
                 "items": items,
                 "total": total,
-                "page": page,
-                "pageSize": page_size
+                "page": None if cursor else page,
+                "pageSize": page_size,
+                "nextCursor": next_cursor,
+                "prevCursor": prev_cursor
             }
             
             return result
@@ -126,7 +195,196 @@ class UserManagementService:
             raise DatabaseError(f"获取用户列表失败: {str(e)}")
     
     @staticmethod
-    def get_user_detail(db: Session, user_id: str) -> Dict[str, Any]:
+    def _status_condition(status: str):
+        """
+        用户状态筛选条件，列表筛选与分面计数共用
+
+        is_active 为 NULL 的用户与响应中一致视为 inactive，两个条件互为补集。
+        """
+        if status == "active":
+            return User.is_active == true()
+        return or_(User.is_active == false(), User.is_active.is_(None))
+    
+    @staticmethod
+    def _status_expression():
+        """用户状态表达式（active / inactive）"""
+        return case((UserManagementService._status_condition("active"), "active"), else_="inactive")
+    
+    @staticmethod
+    async def get_users_facets(db: AsyncSession, keyword: Optional[str] = None) -> Dict[str, Any]:
+        """
+        获取用户列表筛选项的分面计数
+        
+        在当前关键词条件下，按角色、按状态分组计数。各分组查询以 UNION ALL 合并为一条语句，
+        结果与列表总数共用计数缓存，用户写入时失效。
+        """
+        try:
+            cache_key = "facets:" + json.dumps([keyword or ""], ensure_ascii=False)
+            cached_result = user_count_cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+            
+            generation = user_count_cache.generation
+            keyword_filter = user_keyword_filter(keyword) if keyword else None
+            
+            def filtered(query):
+                return query.where(keyword_filter) if keyword_filter is not None else query
+            
+            status = UserManagementService._status_expression()
+            statement = union_all(
+                filtered(select(literal("total"), literal(""), func.count()).select_from(User)),
+                filtered(select(literal("status"), status, func.count()).select_from(User).group_by(status)),
+                filtered(
+                    select(literal("role"), Role.name, func.count())
+                    .select_from(User)
+                    .join(UserRole, UserRole.user_id == User.id)
+                    .join(Role, Role.id == UserRole.role_id)
+                    .group_by(Role.name)
+                ),
+                # 没有匹配用户的角色计为0
+                select(literal("role"), Role.name, literal(0))
+            )
+            
+            result = {"total": 0, "role": {}, "status": {"active": 0, "inactive": 0}}
+            # 结果会被缓存，在主库查询，避免缓存副本上尚未同步的计数
+            rows = (await db.execute(statement, bind_arguments={"bind": get_primary_bind()})).all()
+            for facet, value, count in rows:
+                if facet == "total":
+                    result["total"] = count
+                else:
+                    result[facet][value] = result[facet].get(value, 0) + count
+            
+            user_count_cache.set(cache_key, result, generation)
+            return result
+            
+        except Exception as e:
+            logger.error(f"获取用户分面计数失败: {str(e)}")
+            raise DatabaseError(f"获取用户分面计数失败: {str(e)}")
+    
+    @staticmethod
+    def _count_cache_key(
+        keyword: Optional[str],
+        status: Optional[str],
+        role: Optional[str],
+        departments: List[str],
+        tags: List[str]
+    ) -> str:
+        """总数缓存键（规范化的筛选条件）"""
+        return json.dumps(
+            [keyword or "", status or "all", role or "all", sorted(departments), sorted(tags)],
+            ensure_ascii=False
+        )
+
+    @staticmethod
+    async def _count_users(db: AsyncSession, query, cache_key: str) -> int:
+        """查询筛选后的用户总数，优先使用总数缓存（计数在主库执行）"""
+        total = user_count_cache.get(cache_key)
+        if total is not None:
+            return total
+
+        generation = user_count_cache.generation
+        # 结果会被缓存，在主库查询，避免缓存副本上尚未同步的计数
+        total = await db.scalar(
+            select(func.count()).select_from(query.subquery()),
+            bind_arguments={"bind": get_primary_bind()}
+        )
+        user_count_cache.set(cache_key, total, generation)
+        return total
+
+    @staticmethod
+    def _parse_sorter(sorter: Optional[str]) -> Tuple[str, bool]:
+        """解析排序参数，返回 (字段, 是否降序)，无法识别时按用户ID升序"""
+        if not sorter:
+            return "id", False
+
+        try:
+            sorter_data = json.loads(sorter) if isinstance(sorter, str) else sorter
+            field = sorter_data.get("field", "id")
+            order = sorter_data.get("order", "ascend")
+        except Exception as e:
+            logger.warning(f"排序参数解析失败: {str(e)}")
+            return "id", False
+
+        if field not in UserManagementService.SORT_FIELDS:
+            return "id", False
+        return field, order == "descend"
+
+    @staticmethod
+    def _sort_key(db: AsyncSession, field: str):
+        """
+        排序键表达式
+
+        SQLite 将时间存为文本，服务器默认值（CURRENT_TIMESTAMP）与绑定参数的格式不同，
+        因此按存储的原始文本比较，保证游标定位精确。
+        """
+        if field == "id":
+            return User.id
+
+        column = UserManagementService.SORT_FIELDS[field]
+        if isinstance(column.type, DateTime) and db.get_bind().dialect.name == "sqlite":
+            return type_coerce(column, String)
+        return column
+
+    @staticmethod
+    def _encode_position(row, field: str, descending: bool, direction: str) -> str:
+        """将一行的排序位置编码为游标"""
+        return encode_cursor({
+            "f": field,
+            "o": "descend" if descending else "ascend",
+            "v": row.sort_key,
+            "id": row.id,
+            "d": direction
+        })
+
+    @staticmethod
+    async def _fetch_keyset_page(
+        db: AsyncSession,
+        query,
+        sort_key,
+        field: str,
+        descending: bool,
+        cursor: str,
+        page_size: int
+    ) -> Tuple[list, Optional[str], Optional[str]]:
+        """按游标查询一页，返回 (行, nextCursor, prevCursor)"""
+        position = decode_cursor(cursor)
+        if position.get("f") != field or position.get("o") != ("descend" if descending else "ascend"):
+            raise ValidationError("分页游标与当前排序条件不一致", "cursor")
+
+        # 按列的声明类型校验位置值；SQLite 的时间排序键按存储的原始文本比较（见 _sort_key），仍使用原文
+        column = User.id if field == "id" else UserManagementService.SORT_FIELDS[field]
+        value = parse_cursor_value(position.get("v"), column.type)
+        if not isinstance(sort_key.type, DateTime):
+            value = position.get("v")
+
+        # 向前翻页时按逆序扫描，取到后再反转
+        backward = position["d"] == CURSOR_PREV
+        scan_descending = descending != backward
+        result = await db.execute(
+            query.where(keyset_after(
+                sort_key, User.id, scan_descending, value, position["id"],
+                row_values=supports_row_values(db.get_bind().dialect)
+            ))
+            .order_by(*keyset_order_by(sort_key, User.id, scan_descending))
+            .limit(page_size + 1)
+        )
+        rows = result.all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backward:
+            rows.reverse()
+
+        if not rows:
+            return rows, None, None
+
+        next_cursor = UserManagementService._encode_position(rows[-1], field, descending, CURSOR_NEXT) \
+            if has_more or backward else None
+        prev_cursor = UserManagementService._encode_position(rows[0], field, descending, CURSOR_PREV) \
+            if has_more or not backward else None
+        return rows, next_cursor, prev_cursor
+    
+    @staticmethod
+    async def get_user_detail(db: AsyncSession, user_id: str) -> Dict[str, Any]:
         """获取用户详情"""
         try:
             # 验证参数
@@ -144,7 +402,12 @@ class UserManagementService:
                 raise ValidationError("用户ID格式不正确", "user_id")
             
             # 查询用户
-            user = db.query(User).filter(User.id == user_id_int).first()
+            result = await db.execute(
+                select(User)
+                .options(selectinload(User.user_roles), selectinload(User.user_tags))
+                .where(User.id == user_id_int)
+            )
+            user = result.scalar_one_or_none()
             if not user:
                 raise NotFoundError("用户", user_id)
             
@@ -158,10 +421,10 @@ class UserManagementService:
                 "email": user.email,
                 "role": user_roles[0] if user_roles else "user",
                 "roleName": user_roles[0] if user_roles else "普通用户",
-                "status": "active",  # 模拟数据，实际应从用户表获取
-                "department": "技术部",  # 模拟数据，实际应从用户表获取
+                "status": "active" if user.is_active else "inactive",
+                "department": user.department or "",
                 "phone": "+86-13800138000",  # 模拟数据，实际应从用户表获取
-                "tags": ["北京", "前端"],  # 模拟数据，实际应从用户表获取
+                "tags": [user_tag.tag for user_tag in sorted(user.user_tags, key=lambda user_tag: user_tag.id)],
                 "permissions": user_permissions,
                 "avatar": user.avatar,
                 "is_superuser": user.is_superuser,  # 添加超级用户标识
@@ -180,7 +443,7 @@ class UserManagementService:
             raise DatabaseError(f"获取用户详情失败: {str(e)}")
     
     @staticmethod
-    def create_user(db: Session, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_user(db: AsyncSession, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """创建用户"""
         try:
             # 验证必填字段
@@ -196,53 +459,62 @@ class UserManagementService:
                 raise ValidationError("邮箱格式不正确", "email")
             
             # 检查邮箱是否已存在
-            existing_user = db.query(User).filter(User.email == user_data["email"]).first()
+            existing_user = await db.scalar(select(User.id).where(User.email == user_data["email"]))
             if existing_user:
                 raise ConflictError("邮箱已被注册")
             
             # 生成用户名
             username = user_data["email"].split("@")[0]
-            existing_username = db.query(User).filter(User.username == username).first()
+            existing_username = await db.scalar(select(User.id).where(User.username == username))
             if existing_username:
                 import random
                 username = f"{username}{random.randint(1000, 9999)}"
             
             # 创建用户
-            hashed_password = get_password_hash(user_data["password"])
+            hashed_password = await get_password_hash_async(user_data["password"])
             new_user = User(
                 username=username,
                 email=user_data["email"],
                 password_hash=hashed_password,
                 full_name=user_data["name"],
-                avatar=user_data.get("avatar")
+                avatar=user_data.get("avatar"),
+                department=user_data.get("department")
             )
             
             db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
+            await db.commit()
+            await db.refresh(new_user)
+            
+            # 设置用户标签
+            if user_data.get("tags"):
+                await UserManagementService._set_user_tags(db, new_user.id, user_data["tags"])
+                await db.commit()
             
             # 如果指定了角色，添加角色关联
             if "role" in user_data and user_data["role"]:
-                role = db.query(Role).filter(Role.name == user_data["role"]).first()
+                role = await db.scalar(select(Role).where(Role.name == user_data["role"]))
                 if role:
                     user_role = UserRole(user_id=new_user.id, role_id=role.id)
                     db.add(user_role)
-                    db.commit()
+                    await db.commit()
+            
+            # 用户数变化，列表总数缓存失效
+            user_count_cache.invalidate()
             
             # 返回创建的用户数据
-            return UserManagementService.get_user_detail(db, f"USR-{new_user.id}")
+            return await UserManagementService.get_user_detail(db, f"USR-{new_user.id}")
             
-        except ValidationError:
+        except (ValidationError, HTTPException):
             raise
         except ConflictError:
             raise
         except Exception as e:
             logger.error(f"创建用户失败: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise DatabaseError(f"创建用户失败: {str(e)}")
     
     @staticmethod
-    def update_user(db: Session, user_id: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_user(db: AsyncSession, user_id: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """更新用户信息"""
         try:
             # 验证参数
@@ -260,7 +532,7 @@ class UserManagementService:
                 raise ValidationError("用户ID格式不正确", "user_id")
             
             # 查询用户
-            user = db.query(User).filter(User.id == user_id_int).first()
+            user = await db.scalar(select(User).where(User.id == user_id_int))
             if not user:
                 raise NotFoundError("用户", user_id)
             
@@ -281,9 +553,9 @@ class UserManagementService:
                     raise ValidationError("邮箱格式不正确", "email")
                 
                 # 检查邮箱是否已被其他用户使用
-                existing_user = db.query(User).filter(
-                    and_(User.email == user_data["email"], User.id != user_id_int)
-                ).first()
+                existing_user = await db.scalar(
+                    select(User.id).where(and_(User.email == user_data["email"], User.id != user_id_int))
+                )
                 if existing_user:
                     raise ConflictError("邮箱已被其他用户使用")
                 user.email = user_data["email"]
@@ -291,32 +563,45 @@ class UserManagementService:
             if "avatar" in user_data:
                 user.avatar = user_data["avatar"]
             
+            if "department" in user_data:
+                user.department = user_data["department"] or None
+            
+            if "tags" in user_data:
+                await UserManagementService._set_user_tags(db, user.id, user_data["tags"] or [])
+            
             # 如果提供了密码，更新密码
             if "password" in user_data and user_data["password"]:
                 if len(user_data["password"]) < 6:
                     raise ValidationError("密码长度不能少于6位", "password")
-                user.password_hash = get_password_hash(user_data["password"])
+                user.password_hash = await get_password_hash_async(user_data["password"])
             
-            db.commit()
+            await db.commit()
             
             # 更新角色关联
             if "role" in user_data:
                 # 删除现有角色关联
-                db.query(UserRole).filter(UserRole.user_id == user.id).delete()
+                await db.execute(delete(UserRole).where(UserRole.user_id == user.id))
                 
                 # 添加新角色关联
                 if user_data["role"]:
-                    role = db.query(Role).filter(Role.name == user_data["role"]).first()
+                    role = await db.scalar(select(Role).where(Role.name == user_data["role"]))
                     if role:
                         user_role = UserRole(user_id=user.id, role_id=role.id)
                         db.add(user_role)
                 
-                db.commit()
+                await db.commit()
+                
+                # 角色重新分配后，令牌中的权限声明需要刷新
+                await db.run_sync(bump_permission_version)
+            
+            # 清除认证主体缓存；姓名、邮箱、部门、标签或角色变化会影响筛选后的总数
+            principal_cache.invalidate_user(user.id)
+            user_count_cache.invalidate()
             
             # 返回更新后的用户数据
-            return UserManagementService.get_user_detail(db, f"USR-{user.id}")
+            return await UserManagementService.get_user_detail(db, f"USR-{user.id}")
             
-        except ValidationError:
+        except (ValidationError, HTTPException):
             raise
         except NotFoundError:
             raise
@@ -324,11 +609,11 @@ class UserManagementService:
             raise
         except Exception as e:
             logger.error(f"更新用户信息失败: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise DatabaseError(f"更新用户信息失败: {str(e)}")
     
     @staticmethod
-    def update_user_status(db: Session, user_id: str, status_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_user_status(db: AsyncSession, user_id: str, status_data: Dict[str, Any]) -> Dict[str, Any]:
         """更新用户状态"""
         try:
             # 验证参数
@@ -346,17 +631,25 @@ class UserManagementService:
                 raise ValidationError("用户ID格式不正确", "user_id")
             
             # 查询用户
-            user = db.query(User).filter(User.id == user_id_int).first()
+            user = await db.scalar(select(User).where(User.id == user_id_int))
             if not user:
                 raise NotFoundError("用户", user_id)
             
+            # 更新启用状态
+            if "status" in status_data:
+                user.is_active = status_data["status"] == "active"
+            
             # 更新最后修改时间
             user.updated_at = datetime.utcnow()
-            db.commit()
+            await db.commit()
+            
+            # 清除认证主体缓存，禁用立即生效
+            principal_cache.invalidate_user(user.id)
+            user_count_cache.invalidate()
             
             return {
                 "id": f"USR-{user.id}",
-                "status": status_data.get("status", "active")
+                "status": "active" if user.is_active else "inactive"
             }
             
         except ValidationError:
@@ -365,12 +658,12 @@ class UserManagementService:
             raise
         except Exception as e:
             logger.error(f"更新用户状态失败: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise DatabaseError(f"更新用户状态失败: {str(e)}")
     
     @staticmethod
-    def delete_user(db: Session, user_id: str) -> Dict[str, Any]:
-        """删除用户"""
+    async def revoke_user_tokens(db: AsyncSession, user_id: str) -> Dict[str, Any]:
+        """吊销用户已签发的全部令牌（强制下线）"""
         try:
             # 验证参数
             if not user_id:
@@ -387,13 +680,65 @@ class UserManagementService:
                 raise ValidationError("用户ID格式不正确", "user_id")
             
             # 查询用户
-            user = db.query(User).filter(User.id == user_id_int).first()
+            user = await db.scalar(select(User.id).where(User.id == user_id_int))
+            if not user:
+                raise NotFoundError("用户", user_id)
+            
+            await db.run_sync(token_revocations.revoke_all_for_user, user_id_int)
+            
+            return {
+                "id": f"USR-{user_id_int}",
+                "revoked": True
+            }
+            
+        except ValidationError:
+            raise
+        except NotFoundError:
+            raise
+        except Exception as e:
+            logger.error(f"吊销用户令牌失败: {str(e)}")
+            await db.rollback()
+            raise DatabaseError(f"吊销用户令牌失败: {str(e)}")
+    
+    @staticmethod
+    async def delete_user(db: AsyncSession, user_id: str) -> Dict[str, Any]:
+        """删除用户"""
+        try:
+            # 验证参数
+            if not user_id:
+                raise ValidationError("用户ID不能为空", "user_id")
+            
+            # 提取用户ID
+            if user_id.startswith("USR-"):
+                user_id = user_id[4:]
+            
+            # 验证用户ID格式
+            try:
+                user_id_int = int(user_id)
+            except ValueError:
+                raise ValidationError("用户ID格式不正确", "user_id")
+            
+            # 查询用户（预先加载级联删除与解除关联需要的集合）
+            result = await db.execute(
+                select(User)
+                .options(
+                    selectinload(User.user_roles),
+                    selectinload(User.user_tags),
+                    selectinload(User.operation_logs)
+                )
+                .where(User.id == user_id_int)
+            )
+            user = result.scalar_one_or_none()
             if not user:
                 raise NotFoundError("用户", user_id)
             
             # 删除用户（级联删除相关关联）
-            db.delete(user)
-            db.commit()
+            await db.delete(user)
+            await db.commit()
+            
+            # 清除认证主体缓存和列表总数缓存
+            principal_cache.invalidate_user(user_id_int)
+            user_count_cache.invalidate()
             
             return {"deleted": True}
             
@@ -403,11 +748,11 @@ class UserManagementService:
             raise
         except Exception as e:
             logger.error(f"删除用户失败: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise DatabaseError(f"删除用户失败: {str(e)}")
     
     @staticmethod
-    def bulk_delete_users(db: Session, ids: List[str]) -> Dict[str, Any]:
+    async def bulk_delete_users(db: AsyncSession, ids: List[str]) -> Dict[str, Any]:
         """批量删除用户"""
         try:
             if not ids:
@@ -427,9 +772,26 @@ class UserManagementService:
                     except ValueError:
                         raise ValidationError(f"用户ID格式不正确: {user_id}", "ids")
             
+            # 批量DELETE不经过ORM级联，先删除用户的角色关联与标签
+            await db.execute(
+                delete(UserRole).where(UserRole.user_id.in_(user_ids)).execution_options(synchronize_session=False)
+            )
+            await db.execute(
+                delete(UserTag).where(UserTag.user_id.in_(user_ids)).execution_options(synchronize_session=False)
+            )
+            
             # 查询并删除用户
-            deleted_count = db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
-            db.commit()
+            result = await db.execute(
+                delete(User).where(User.id.in_(user_ids)).execution_options(synchronize_session=False)
+            )
+            deleted_count = result.rowcount
+            await db.commit()
+            
+            # 清除认证主体缓存和列表总数缓存；批量DELETE不触发ORM事件，联想索引需手动移除
+            for deleted_id in user_ids:
+                principal_cache.invalidate_user(deleted_id)
+                user_suggest_index.remove(deleted_id)
+            user_count_cache.invalidate()
             
             return {"deleted": deleted_count}
             
@@ -437,25 +799,80 @@ class UserManagementService:
             raise
         except Exception as e:
             logger.error(f"批量删除用户失败: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise DatabaseError(f"批量删除用户失败: {str(e)}")
     
+    @staticmethod
+    async def _get_role_ids_by_user(db: AsyncSession, user_ids: List[int]) -> Dict[int, List[int]]:
+        """批量查询用户的角色ID"""
+        role_ids_by_user: Dict[int, List[int]] = {}
+        if not user_ids:
+            return role_ids_by_user
+        
+        result = await db.execute(
+            select(UserRole.user_id, UserRole.role_id)
+            .where(UserRole.user_id.in_(user_ids))
+            .order_by(UserRole.user_id, UserRole.id)
+        )
+        for user_id, role_id in result:
+            role_ids_by_user.setdefault(user_id, []).append(role_id)
+        return role_ids_by_user
+    
+    @staticmethod
+    async def _get_tags_by_user(db: AsyncSession, user_ids: List[int]) -> Dict[int, List[str]]:
+        """批量查询用户的标签"""
+        tags_by_user: Dict[int, List[str]] = {}
+        if not user_ids:
+            return tags_by_user
+        
+        result = await db.execute(
+            select(UserTag.user_id, UserTag.tag)
+            .where(UserTag.user_id.in_(user_ids))
+            .order_by(UserTag.user_id, UserTag.id)
+        )
+        for user_id, tag in result:
+            tags_by_user.setdefault(user_id, []).append(tag)
+        return tags_by_user
+    
+    @staticmethod
+    async def _set_user_tags(db: AsyncSession, user_id: int, tags: List[str]) -> None:
+        """替换用户的全部标签（去除空白与重复）"""
+        normalized = []
+        for tag in tags:
+            tag = (tag or "").strip()
+            if not tag:
+                continue
+            if len(tag) > 50:
+                raise ValidationError("标签长度不能超过50个字符", "tags")
+            if tag not in normalized:
+                normalized.append(tag)
+        
+        await db.execute(delete(UserTag).where(UserTag.user_id == user_id))
+        db.add_all(UserTag(user_id=user_id, tag=tag) for tag in normalized)
+    
+    @staticmethod
+    def _split_values(value: Optional[str]) -> List[str]:
+        """拆分逗号分隔的筛选值"""
+        if not value:
+            return []
+        return [item.strip() for item in value.split(",") if item.strip()]
+    
     @staticmethod
     def _get_user_roles_and_permissions(user: User) -> Tuple[List[str], List[str]]:
         """获取用户的角色和权限"""
+        # 角色名称与权限由内存中的权限矩阵解析，只需加载用户的角色ID
+        return UserManagementService._resolve_roles_and_permissions(
+            [user_role.role_id for user_role in user.user_roles]
+        )
+    
+    @staticmethod
+    def _resolve_roles_and_permissions(role_ids: List[int]) -> Tuple[List[str], List[str]]:
+        """根据角色ID解析角色名称和权限名称"""
         user_roles = []
         user_permissions = []
         
         try:
-            for user_role in user.user_roles:
-                user_roles.append(user_role.role.name)
-                
-                # 获取角色权限
-                for role_permission in user_role.role.role_permissions:
-                    user_permissions.append(role_permission.permission.name)
-            
-            # 去重
-            user_permissions = list(set(user_permissions))
+            user_roles, user_permissions = permission_matrix.roles_and_permissions(role_ids)
             
         except Exception as e:
             logger.warning(f"获取用户角色权限失败: {str(e)}")
@@ -1,13 +1,20 @@
-from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from ..models.user import User
+from ..models.operation_log import OperationLog
 from ..models.role import Role
 from ..models.permission import Permission
 from ..models.user_role import UserRole
 from ..models.role_permission import RolePermission
-from ..core.security import get_password_hash, verify_password
+from ..core.permission_matrix import permission_matrix
+from ..core.permission_claims import bump_permission_version
+from ..core.security import get_password_hash_async, verify_and_update_password_async
 from ..utils.logger import get_logger
+from ..utils.cache import user_count_cache
 from ..utils.exceptions import ValidationError, NotFoundError, DatabaseError
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import datetime
 
 logger = get_logger(__name__)
@@ -16,16 +23,16 @@ class UserService:
     """用户相关服务"""
     
     @staticmethod
-    def get_user_by_username(db: Session, username: str) -> User:
+    async def get_user_by_username(db: AsyncSession, username: str) -> User:
         """根据用户名获取用户"""
         # 验证参数
         if not username:
             raise ValidationError("用户名不能为空", "username")
         
-        return db.query(User).filter(User.username == username).first()
+        return await db.scalar(select(User).where(User.username == username))
     
     @staticmethod
-    def get_user_by_email(db: Session, email: str) -> User:
+    async def get_user_by_email(db: AsyncSession, email: str) -> User:
         """根据邮箱获取用户"""
         # 验证参数
         if not email:
@@ -35,27 +42,20 @@ class UserService:
         import re
         email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         
-        return db.query(User).filter(User.email == email).first()
+        return await db.scalar(select(User).where(User.email == email))
     
     @staticmethod
-    def get_user_roles_and_permissions(db: Session, user: User) -> Tuple[List[str], List[str]]:
+    async def get_user_roles_and_permissions(db: AsyncSession, user: User) -> Tuple[List[str], List[str]]:
         """获取用户的角色和权限"""
         user_roles = []
         user_permissions = []
         
         try:
-            # 获取用户角色
-            for user_role in user.user_roles:
-                role = user_role.role
-                user_roles.append(role.name)
-                
-                # 获取角色权限
-                for role_permission in role.role_permissions:
-                    permission = role_permission.permission
-                    user_permissions.append(permission.name)
-            
-            # 去重
-            user_permissions = list(set(user_permissions))
+            # 角色名称与权限由内存中的权限矩阵解析，只需查询用户的角色ID
+            role_ids = (await db.scalars(
+                select(UserRole.role_id).where(UserRole.user_id == user.id)
+            )).all()
+            user_roles, user_permissions = permission_matrix.roles_and_permissions(role_ids)
             
         except Exception as e:
             logger.error(f"获取用户角色权限失败: {str(e)}")
@@ -66,18 +66,18 @@ class UserService:
         return user_roles, user_permissions
     
     @staticmethod
-    def update_last_login(db: Session, user: User):
+    async def update_last_login(db: AsyncSession, user: User):
         """更新用户最后登录时间"""
         try:
             user.last_login = datetime.datetime.utcnow()
-            db.commit()
+            await db.commit()
         except Exception as e:
             logger.error(f"更新用户最后登录时间失败: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise DatabaseError(f"更新用户最后登录时间失败: {str(e)}")
     
     @staticmethod
-    def create_user(db: Session, username: str, email: str, password: str, full_name: str = None) -> User:
+    async def create_user(db: AsyncSession, username: str, email: str, password: str, full_name: str = None) -> User:
         """创建新用户"""
         try:
             # 验证参数
@@ -96,7 +96,7 @@ class UserService:
             if not re.match(email_pattern, email):
                 raise ValidationError("邮箱格式不正确", "email")
             
-            hashed_password = get_password_hash(password)
+            hashed_password = await get_password_hash_async(password)
             new_user = User(
                 username=username,
                 email=email,
@@ -105,20 +105,21 @@ class UserService:
             )
             
             db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
+            await db.commit()
+            await db.refresh(new_user)
+            user_count_cache.invalidate()
             
             return new_user
             
-        except ValidationError:
+        except (ValidationError, HTTPException):
             raise
         except Exception as e:
             logger.error(f"创建用户失败: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise DatabaseError(f"创建用户失败: {str(e)}")
     
     @staticmethod
-    def assign_default_role(db: Session, user: User):
+    async def assign_default_role(db: AsyncSession, user: User):
         """为用户分配默认角色"""
         try:
             # 验证参数
@@ -126,7 +127,7 @@ class UserService:
                 raise ValidationError("用户不能为空", "user")
             
             # 查找普通用户角色
-            user_role = db.query(Role).filter(Role.name == "user").first()
+            user_role = await db.scalar(select(Role).where(Role.name == "user"))
             
             if not user_role:
                 logger.warning("未找到普通用户角色，创建默认角色...")
@@ -136,17 +137,17 @@ class UserService:
                     description="普通用户，拥有基本查看权限"
                 )
                 db.add(user_role)
-                db.commit()
-                db.refresh(user_role)
+                await db.commit()
+                await db.refresh(user_role)
                 
                 # 为普通用户角色分配基本权限
-                basic_permissions = db.query(Permission).filter(
+                basic_permissions = (await db.scalars(select(Permission).where(
                     Permission.name.in_([
                         "dashboard:view",
                         "users:view",
                         "roles:view"
                     ])
-                ).all()
+                ))).all()
                 
                 for permission in basic_permissions:
                     role_permission = RolePermission(
@@ -155,7 +156,14 @@ class UserService:
                     )
                     db.add(role_permission)
                 
-                db.commit()
+                await db.commit()
+                permission_matrix.set_role(
+                    user_role.id,
+                    user_role.name,
+                    [permission.name for permission in basic_permissions]
+                )
+                # 其他进程的权限矩阵据此重新加载新角色
+                await db.run_sync(bump_permission_version)
                             
             # 将用户分配到普通用户角色
             user_role_assignment = UserRole(
@@ -163,20 +171,21 @@ class UserService:
                 role_id=user_role.id
             )
             db.add(user_role_assignment)
-            db.commit()
+            await db.commit()
+            user_count_cache.invalidate()
             
             logger.info(f"用户 {user.username} 已分配默认角色: {user_role.name}")
             
         except Exception as e:
             logger.error(f"为用户分配默认角色失败: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise DatabaseError(f"为用户分配默认角色失败: {str(e)}")
 
 class AuthService:
     """认证相关服务"""
     
     @staticmethod
-    def verify_user_credentials(db: Session, username: str, password: str) -> User:
+    async def verify_user_credentials(db: AsyncSession, username: str, password: str) -> User:
         """验证用户凭据"""
         # 验证参数
         if not username:
@@ -185,17 +194,21 @@ class AuthService:
         if not password:
             raise ValidationError("密码不能为空", "password")
         
-        user = UserService.get_user_by_username(db, username)
+        user = await UserService.get_user_by_username(db, username)
         if not user:
             return None
             
-        if not verify_password(password, user.password_hash):
+        verified, new_hash = await verify_and_update_password_async(password, user.password_hash)
+        if not verified:
             return None
+        
+        if new_hash:
+            await AuthService.upgrade_password_hash(db, user, new_hash)
             
         return user
     
     @staticmethod
-    def verify_user_credentials_by_email(db: Session, email: str, password: str) -> User:
+    async def verify_user_credentials_by_email(db: AsyncSession, email: str, password: str) -> User:
         """通过邮箱验证用户凭据"""
         # 验证参数
         if not email:
@@ -204,11 +217,104 @@ class AuthService:
         if not password:
             raise ValidationError("密码不能为空", "password")
         
-        user = UserService.get_user_by_email(db, email)
+        user = await UserService.get_user_by_email(db, email)
         if not user:
             return None
             
-        if not verify_password(password, user.password_hash):
+        verified, new_hash = await verify_and_update_password_async(password, user.password_hash)
+        if not verified:
             return None
+        
+        if new_hash:
+            await AuthService.upgrade_password_hash(db, user, new_hash)
             
-        return user
\ No newline at end of file
+        return user
+    
+    @staticmethod
+    async def login(
+        db: AsyncSession,
+        email: str,
+        password: str,
+        ip_address: str,
+        user_agent: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        登录快速路径
+
+        一次查询取出用户及其角色关联（角色名称与权限由权限矩阵解析），
+        最后登录时间、按需更新的密码哈希与登录日志在同一事务中提交。
+        凭据无效时返回 None。
+        """
+        # 验证参数
+        if not email:
+            raise ValidationError("邮箱不能为空", "email")
+        
+        if not password:
+            raise ValidationError("密码不能为空", "password")
+        
+        result = await db.execute(
+            select(User).options(joinedload(User.user_roles)).where(User.email == email)
+        )
+        user = result.unique().scalar_one_or_none()
+        if not user:
+            return None
+        
+        verified, new_hash = await verify_and_update_password_async(password, user.password_hash)
+        if not verified:
+            return None
+        
+        role_ids = [user_role.role_id for user_role in user.user_roles]
+        user_roles, user_permissions = permission_matrix.roles_and_permissions(role_ids)
+        
+        # 提交前取出所需字段，避免提交后属性过期再次查询
+        last_login = datetime.datetime.utcnow()
+        login_info = {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "full_name": user.full_name,
+            "avatar": user.avatar,
+            "is_superuser": user.is_superuser,
+            "last_login": last_login,
+            "roles": user_roles,
+            "permissions": user_permissions
+        }
+        
+        try:
+            user.last_login = last_login
+            if new_hash:
+                user.password_hash = new_hash
+            
+            # 记录登录操作日志（重要的安全事件）
+            db.add(OperationLog(
+                user_id=user.id,
+                action="用户登录",
+                resource="auth",
+                description="用户登录成功(JSON)",
+                ip_address=ip_address,
+                user_agent=user_agent,
+                request_data={"email": email},
+                response_data={"login_success": True}
+            ))
+            await db.commit()
+            
+            if new_hash:
+                logger.info(f"用户 {login_info['username']} 的密码哈希已按当前策略更新")
+        except Exception as e:
+            logger.error(f"记录登录信息失败: {str(e)}")
+            await db.rollback()
+            raise DatabaseError(f"记录登录信息失败: {str(e)}")
+        
+        return login_info
+    
+    @staticmethod
+    async def upgrade_password_hash(db: AsyncSession, user: User, new_hash: str):
+        """哈希策略变化后，用登录时重新生成的哈希替换旧哈希"""
+        try:
+            user.password_hash = new_hash
+            await db.commit()
+            logger.info(f"用户 {user.username} 的密码哈希已按当前策略更新")
+        except Exception as e:
+            # 更新失败不影响本次登录，下次登录会再次尝试
+            logger.warning(f"更新用户密码哈希失败: {str(e)}")
+            await db.rollback()
@@ -0,0 +1,43 @@
+"""
+布隆过滤器实现
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """基于 bytearray 的布隆过滤器，只会误报、不会漏报"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Args:
+            capacity: 预期元素数量
+            error_rate: 达到预期数量时的误报率
+        """
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str) -> None:
+        """
+        添加元素
+
+        Args:
+            item: 元素
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def _positions(self, item: str):
+        """双重哈希生成 hash_count 个位置"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
@@ -1,8 +1,12 @@
 """
 简单内存缓存实现
 """
+import threading
 import time
-from typing import Any, Optional, Dict
+from collections import OrderedDict
+from typing import Any, Optional, Dict, Set
+
+from ..core.config import settings
 
 
 class SimpleCache:
@@ -62,5 +66,166 @@ class SimpleCache:
         self._cache.clear()
 
 
+class PrincipalCache:
+    """
+    有界的认证主体缓存
+
+    以令牌主体（sub）为键缓存用户的列快照，避免每次认证都查询用户表。
+    条目的过期时间不晚于令牌的 exp，容量超限时按 LRU 淘汰。
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: int = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, subject: str) -> Optional[Dict[str, Any]]:
+        """
+        获取主体快照
+
+        Args:
+            subject: 令牌主体
+
+        Returns:
+            用户列数据，如果不存在或已过期则返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+
+            if time.time() > entry['expires_at']:
+                self._remove(subject)
+                return None
+
+            self._entries.move_to_end(subject)
+            return entry['value']
+
+    def set(self, subject: str, value: Dict[str, Any], token_exp: Optional[float] = None) -> None:
+        """
+        设置主体快照
+
+        Args:
+            subject: 令牌主体
+            value: 用户列数据，必须包含 id
+            token_exp: 令牌过期时间戳，条目不会比它更晚过期
+        """
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+
+        with self._lock:
+            self._remove(subject)
+            self._entries[subject] = {
+                'value': value,
+                'expires_at': expires_at
+            }
+            self._keys_by_user.setdefault(value['id'], set()).add(subject)
+
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        使指定用户的所有条目失效
+
+        Args:
+            user_id: 用户ID
+        """
+        with self._lock:
+            for subject in list(self._keys_by_user.get(user_id, ())):
+                self._remove(subject)
+
+    def clear(self) -> None:
+        """清空所有缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, subject: str) -> None:
+        """移除条目并维护反向索引（调用方需持有锁）"""
+        entry = self._entries.pop(subject, None)
+        if entry is None:
+            return
+
+        user_id = entry['value']['id']
+        subjects = self._keys_by_user.get(user_id)
+        if subjects is not None:
+            subjects.discard(subject)
+            if not subjects:
+                del self._keys_by_user[user_id]
+
+
+class CountCache:
+    """
+    列表计数缓存
+
+    以规范化后的筛选条件为键缓存 COUNT 或分组计数结果。数据写入后调用 invalidate 清空全部条目；
+    条目另有较短的存活时间，限制其他进程写入时的陈旧程度。
+    invalidate 会递增代数，查询开始前取得的代数已过时的结果不再写入缓存。
+    """
+
+    def __init__(self, max_size: int = 256, ttl: int = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """当前代数，在查询计数之前读取并传给 set"""
+        return self._generation
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存的计数，不存在或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if time.time() > entry['expires_at']:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return entry['value']
+
+    def set(self, key: str, value: Any, generation: int) -> None:
+        """缓存计数，期间发生过 invalidate 时忽略"""
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            self._entries[key] = {
+                'value': value,
+                'expires_at': time.time() + self.ttl
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """使全部条目失效"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
 # 创建全局缓存实例
 cache = SimpleCache()
+
+# 认证主体缓存实例
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL
+)
+
+# 用户列表总数与分面计数缓存实例
+user_count_cache = CountCache(
+    max_size=settings.USER_COUNT_CACHE_SIZE,
+    ttl=settings.USER_COUNT_CACHE_TTL
+)
@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.types import TypeEngine
+
+from .exceptions import ValidationError
+
+# 游标翻页方向
+CURSOR_NEXT = "next"
+CURSOR_PREV = "prev"
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """将翻页位置编码为不透明的游标字符串"""
+    raw = json.dumps(
+        position,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value)
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """解码游标字符串，格式无效时抛出 ValidationError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValidationError("分页游标无效", "cursor")
+
+    if not isinstance(position, dict) or position.get("d") not in (CURSOR_NEXT, CURSOR_PREV):
+        raise ValidationError("分页游标无效", "cursor")
+
+    tiebreaker_value = position.get("id")
+    if not isinstance(tiebreaker_value, int) or isinstance(tiebreaker_value, bool):
+        raise ValidationError("分页游标无效", "cursor")
+    return position
+
+def parse_cursor_value(value: Any, key_type: TypeEngine) -> Any:
+    """
+    按排序键的类型校验并还原游标中的位置值，取值无效时抛出 ValidationError
+
+    日期时间由ISO字符串还原，其余类型须与排序键的Python类型一致，
+    避免非法取值进入查询后才报错。
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bool, dict, list)):
+        raise ValidationError("分页游标无效", "cursor")
+
+    try:
+        python_type = key_type.python_type
+    except NotImplementedError:
+        return value
+
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise ValidationError("分页游标无效", "cursor")
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValidationError("分页游标无效", "cursor")
+
+    if python_type is float and isinstance(value, int):
+        return value
+    if not isinstance(value, python_type):
+        raise ValidationError("分页游标无效", "cursor")
+    return value
+
+def supports_row_values(dialect: Dialect) -> bool:
+    """数据库是否支持行值比较 (a, b) > (x, y)"""
+    if dialect.name == "sqlite":
+        return getattr(dialect.dbapi, "sqlite_version_info", (0,)) >= (3, 15, 0)
+    return dialect.name in ("postgresql", "mysql", "mariadb")
+
+def keyset_order_by(key: ColumnElement, tiebreaker: ColumnElement, descending: bool) -> List[ColumnElement]:
+    """
+    键集分页的排序子句
+
+    升序时 NULL 排在最前，降序时 NULL 排在最后，使两个方向互为逆序；
+    tiebreaker（通常为主键）保证排序唯一。
+    """
+    if key is tiebreaker:
+        return [tiebreaker.desc() if descending else tiebreaker.asc()]
+    if descending:
+        return [key.desc().nulls_last(), tiebreaker.desc()]
+    return [key.asc().nulls_first(), tiebreaker.asc()]
+
+def keyset_after(
+    key: ColumnElement,
+    tiebreaker: ColumnElement,
+    descending: bool,
+    value: Any,
+    tiebreaker_value: Any,
+    row_values: bool = False
+) -> ColumnElement:
+    """
+    按 keyset_order_by 的顺序，位于 (value, tiebreaker_value) 之后的行
+
+    row_values 为 True 时（见 supports_row_values），非 NULL 位置使用行值比较
+    (key, tiebreaker) > (value, tiebreaker_value)，可直接利用 (key, tiebreaker) 上的索引范围扫描；
+    否则展开为等价的 OR 条件。
+    """
+    tiebreaker_after = tiebreaker < tiebreaker_value if descending else tiebreaker > tiebreaker_value
+    if key is tiebreaker:
+        return tiebreaker_after
+
+    if row_values and value is not None:
+        row, position = tuple_(key, tiebreaker), tuple_(value, tiebreaker_value)
+        if descending:
+            # 行值比较中 NULL 不满足条件，NULL 在末尾需单独包含
+            return or_(row < position, key.is_(None))
+        # NULL 在最前，已经翻过
+        return row > position
+
+    if descending:
+        # NULL 在末尾
+        if value is None:
+            return and_(key.is_(None), tiebreaker_after)
+        return or_(key < value, and_(key == value, tiebreaker_after), key.is_(None))
+
+    # NULL 在最前
+    if value is None:
+        return or_(and_(key.is_(None), tiebreaker_after), key.isnot(None))
+    return or_(key > value, and_(key == value, tiebreaker_after))
@@ -1,9 +1,11 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ..core.database import get_db
+from ..core.database import get_async_db
+from ..core.permission_claims import TokenClaims, is_claims_current
+from ..core.security import get_auth_context
 from ..models.user import User
 from ..routers.auth import get_current_user
 from ..utils.logger import get_logger
@@ -12,42 +14,47 @@ logger = get_logger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login-json")
 
+async def _get_current_claims(request: Request, db: AsyncSession) -> Optional[TokenClaims]:
+    """获取当前令牌中仍然有效的授权声明，缺失或版本过期时返回 None"""
+    claims = get_auth_context(request).claims
+    if claims is None:
+        return None
+    # 权限版本号缓存过期时经异步会话查询
+    if not await db.run_sync(lambda session: is_claims_current(claims, session)):
+        return None
+    return claims
+
+async def _require_current_claims(request: Request, current_user: User, db: AsyncSession) -> TokenClaims:
+    """获取有效的授权声明，否则要求客户端刷新令牌"""
+    claims = await _get_current_claims(request, db)
+    if claims is None:
+        logger.info(f"用户 {current_user.username} 的令牌权限声明已过期，需要刷新令牌")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="权限已变更，请刷新令牌",
+            headers={"WWW-Authenticate": 'Bearer error="invalid_token"'},
+        )
+    return claims
+
 def require_permissions(required_permissions: List[str]):
     """权限校验装饰器工厂"""
-    def permission_checker(
+    async def permission_checker(
+        request: Request,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
     ):
-        """检查用户是否有所需权限"""
+        """检查用户是否有所需权限（仅依据令牌中的授权声明）"""
         logger.debug(f"检查用户权限: {current_user.username}, 需要权限: {required_permissions}")
         
+        claims = await _require_current_claims(request, current_user, db)
+        
         # 超级用户拥有所有权限
-        if current_user.is_superuser:
+        if claims.is_superuser:
             logger.debug(f"用户 {current_user.username} 是超级用户，跳过权限检查")
             return current_user
         
-        # 获取用户所有权限
-        user_permissions = []
-        try:
-            for user_role in current_user.user_roles:
-                for role_permission in user_role.role.role_permissions:
-                    user_permissions.append(role_permission.permission.name)
-            user_permissions = list(set(user_permissions))
-        except Exception as e:
-            logger.error(f"获取用户权限失败: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="获取用户权限失败"
-            )
-        
-        # 检查是否有所需权限
-        has_permission = False
-        for permission in required_permissions:
-            if permission in user_permissions or "*" in user_permissions:
-                has_permission = True
-                break
-        
-        if not has_permission:
+        # 检查是否有所需权限（精确授权按位与，通配授权查前缀树）
+        if not claims.grants_any(required_permissions):
             logger.warning(f"用户 {current_user.username} 权限不足，需要权限: {required_permissions}")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -61,29 +68,22 @@ def require_permissions(required_permissions: List[str]):
 
 def require_roles(required_roles: List[str]):
     """角色校验装饰器工厂"""
-    def role_checker(
+    async def role_checker(
+        request: Request,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
     ):
-        """检查用户是否有所需角色"""
+        """检查用户是否有所需角色（仅依据令牌中的授权声明）"""
         logger.debug(f"检查用户角色: {current_user.username}, 需要角色: {required_roles}")
         
+        claims = await _require_current_claims(request, current_user, db)
+        
         # 超级用户拥有所有角色
-        if current_user.is_superuser:
+        if claims.is_superuser:
             logger.debug(f"用户 {current_user.username} 是超级用户，跳过角色检查")
             return current_user
         
-        # 获取用户所有角色
-        user_roles = []
-        try:
-            for user_role in current_user.user_roles:
-                user_roles.append(user_role.role.name)
-        except Exception as e:
-            logger.error(f"获取用户角色失败: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="获取用户角色失败"
-            )
+        user_roles = claims.roles
         
         # 检查是否有所需角色
         has_role = any(role in user_roles for role in required_roles)
@@ -108,34 +108,25 @@ require_system_management = require_permissions(["system:view", "system:edit"])
 require_audit_view = require_permissions(["audit:view"])
 
 # 可选的权限校验器（不强制要求）
-def optional_permission_checker(
+async def optional_permission_checker(
     required_permissions: List[str],
+    request: Request,
     current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """可选的权限校验，不抛出异常，返回是否有权限的标志"""
     if not current_user:
         return {"user": None, "has_permission": False}
     
+    claims = await _get_current_claims(request, db)
+    if claims is None:
+        return {"user": current_user, "has_permission": False}
+    
     # 超级用户拥有所有权限
-    if current_user.is_superuser:
+    if claims.is_superuser:
         return {"user": current_user, "has_permission": True}
     
-    # 获取用户所有权限
-    user_permissions = []
-    try:
-        for user_role in current_user.user_roles:
-            for role_permission in user_role.role.role_permissions:
-                user_permissions.append(role_permission.permission.name)
-        user_permissions = list(set(user_permissions))
-    except Exception as e:
-        logger.error(f"获取用户权限失败: {str(e)}")
-        return {"user": current_user, "has_permission": False}
-    
-    # 检查是否有所需权限
-    has_permission = any(
-        permission in user_permissions or "*" in user_permissions 
-        for permission in required_permissions
-    )
+    # 检查是否有所需权限（精确授权按位与，通配授权查前缀树）
+    has_permission = claims.grants_any(required_permissions)
     
     return {"user": current_user, "has_permission": has_permission}
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+排序数组前缀索引
+"""
+import threading
+from bisect import bisect_left, insort
+from typing import Iterable, List, Tuple
+
+
+class PrefixIndex:
+    """
+    内存前缀索引
+
+    (键, ID) 按字典序存放在排序数组中，前缀查询为一次二分查找加顺序扫描，
+    耗时与结果数成正比，与索引规模基本无关。同一ID可以有多个键。
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[str, int]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, entries: Iterable[Tuple[str, int]]) -> None:
+        """用全部 (键, ID) 重建索引"""
+        entries = sorted(entries)
+        with self._lock:
+            self._entries = entries
+
+    def add(self, key: str, item_id: int) -> None:
+        """加入一个键"""
+        with self._lock:
+            insort(self._entries, (key, item_id))
+
+    def remove(self, key: str, item_id: int) -> None:
+        """移除一个键，不存在时忽略"""
+        with self._lock:
+            index = bisect_left(self._entries, (key, item_id))
+            if index < len(self._entries) and self._entries[index] == (key, item_id):
+                del self._entries[index]
+
+    def search(self, prefix: str, limit: int) -> List[int]:
+        """
+        查询以 prefix 开头的键对应的ID（按键的字典序，去重）
+
+        Args:
+            prefix: 键前缀
+            limit: 最多返回的ID数
+        """
+        result: List[int] = []
+        seen = set()
+        with self._lock:
+            entries = self._entries
+            index = bisect_left(entries, (prefix,))
+            while index < len(entries) and len(result) < limit:
+                key, item_id = entries[index]
+                if not key.startswith(prefix):
+                    break
+                if item_id not in seen:
+                    seen.add(item_id)
+                    result.append(item_id)
+                index += 1
+        return result
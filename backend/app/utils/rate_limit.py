@@ -0,0 +1,121 @@
+"""
+令牌桶限流器
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+
+from ..core.config import settings
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class TokenBucketLimiter:
+    """
+    按键计数的令牌桶限流器
+
+    每个键一个桶，容量为 burst，每秒恢复 rate 个令牌。
+    桶按最近使用顺序保存在 OrderedDict 中：已恢复满的桶与不存在等价，
+    每次访问时从最久未用的一端顺带清理；条目数超过 max_keys 时淘汰最久未用的桶。
+    单次检查与清理的均摊开销为 O(1)。
+    """
+
+    def __init__(self, burst: int, per_minute: float, max_keys: int):
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.max_keys = max_keys
+        # 空桶恢复满所需时间，超过该时间未访问的桶可以丢弃
+        self._idle_ttl = burst / self.rate
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def acquire(self, key: str) -> float:
+        """
+        消耗一个令牌
+
+        Args:
+            key: 限流键
+
+        Returns:
+            0 表示放行，否则为需要等待的秒数
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens, updated = bucket
+                bucket[0] = min(self.burst, tokens + (now - updated) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+    def reset(self, key: str) -> None:
+        """清除某个键的计数"""
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def _expire(self, now: float) -> None:
+        """丢弃已经恢复满的桶"""
+        buckets = self._buckets
+        while buckets:
+            key, (_, updated) = next(iter(buckets.items()))
+            if now - updated < self._idle_ttl:
+                break
+            buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class AuthThrottle:
+    """认证接口限流：同时按客户端IP和邮箱计数，在任何密码哈希之前拒绝"""
+
+    def __init__(self):
+        self.by_ip = TokenBucketLimiter(
+            settings.AUTH_THROTTLE_IP_BURST,
+            settings.AUTH_THROTTLE_IP_PER_MINUTE,
+            settings.AUTH_THROTTLE_MAX_KEYS
+        )
+        self.by_email = TokenBucketLimiter(
+            settings.AUTH_THROTTLE_EMAIL_BURST,
+            settings.AUTH_THROTTLE_EMAIL_PER_MINUTE,
+            settings.AUTH_THROTTLE_MAX_KEYS
+        )
+
+    def check(self, scope: str, client_ip: str, email: Optional[str] = None) -> None:
+        """
+        检查是否允许本次尝试，超出限制时抛出429
+
+        Args:
+            scope: 接口标识，不同接口分别计数
+            client_ip: 客户端IP（get_client_ip 只在可信代理之后采用转发头）
+            email: 请求中的邮箱
+        """
+        wait = self.by_ip.acquire(f"{scope}:{client_ip}")
+        if not wait and email:
+            wait = self.by_email.acquire(f"{scope}:{email.strip().lower()}")
+
+        if wait:
+            logger.warning(f"认证请求被限流: {scope}, IP {client_ip}, 邮箱 {email}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="尝试次数过多，请稍后再试",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+# 全局认证限流实例
+auth_throttle = AuthThrottle()
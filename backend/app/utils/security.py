@@ -1,20 +1,12 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-import os
-from dotenv import load_dotenv
 
-# 加载环境变量
-load_dotenv()
+from ..core.config import settings
+from ..core.hashing import password_hasher, pwd_context as shared_pwd_context
+from ..core.jwt_backend import TokenDecodeError, get_jwt_backend
 
-# 配置
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 密码加密上下文（与 core.security 共用同一哈希策略）
+pwd_context = shared_pwd_context
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
@@ -24,22 +16,30 @@ def get_password_hash(password: str) -> str:
     """生成密码哈希"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在哈希线程池中验证密码"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """在哈希线程池中生成密码哈希"""
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """创建访问令牌"""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = get_jwt_backend().encode(to_encode)
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[dict]:
     """验证令牌"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = get_jwt_backend().decode(token)
         return payload
-    except JWTError:
+    except TokenDecodeError:
         return None
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""
+时间转换工具
+"""
+from datetime import datetime, timezone
+
+
+def utc_timestamp(value: datetime) -> float:
+    """将数据库中的UTC时间（不带时区）转换为时间戳"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
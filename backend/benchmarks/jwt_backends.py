@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+JWT 后端基准测试
+
+在本机测量各 JWT 后端（python-jose / PyJWT）在 HS256 与非对称算法下的
+签发、解码吞吐量，以及 verify_token 的端到端耗时（解码 + 吊销检查 + 认证主体缓存）。
+
+用法:
+    python benchmarks/jwt_backends.py [--seconds 1.0] [--algorithms HS256,RS256,ES256]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 使用临时数据库，避免影响开发数据
+_workdir = tempfile.mkdtemp(prefix="jwt-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/bench.db"
+os.environ["LOG_FILE"] = f"{_workdir}/bench.log"
+os.environ["LOG_LEVEL"] = "ERROR"
+os.environ.setdefault("BACKEND_CORS_ORIGINS", '["http://localhost"]')
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, rsa  # noqa: E402
+
+from app.core.database import SessionLocal, init_db  # noqa: E402
+from app.core.jwt_backend import JWT_BACKENDS, configure_jwt_backend  # noqa: E402
+from app.core.security import create_access_token, verify_token  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+def generate_key_pair(algorithm: str):
+    """为非对称算法生成PEM格式的密钥对"""
+    if algorithm.startswith(("RS", "PS")):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "ES384":
+        private_key = ec.generate_private_key(ec.SECP384R1())
+    else:
+        raise ValueError(f"不支持的算法: {algorithm}")
+
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_pem, public_pem
+
+def measure(func, seconds: float) -> float:
+    """在给定时长内重复执行，返回每秒操作数"""
+    func()  # 预热
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            func()
+        count += 50
+    return count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="JWT 后端基准测试")
+    parser.add_argument("--seconds", type=float, default=1.0, help="每项测试的时长（秒）")
+    parser.add_argument("--algorithms", default="HS256,RS256,ES256", help="逗号分隔的算法列表")
+    parser.add_argument("--backends", default=",".join(JWT_BACKENDS), help="逗号分隔的后端列表")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    user = db.query(User).first()
+    claims = {"sub": str(user.id)}
+
+    print(f"{'后端':<8}{'算法':<8}{'签发 ops/s':>14}{'解码 ops/s':>14}{'verify_token ops/s':>22}{'单次 verify':>14}")
+    for algorithm in args.algorithms.split(","):
+        private_pem = public_pem = None
+        if not algorithm.startswith("HS"):
+            private_pem, public_pem = generate_key_pair(algorithm)
+
+        for name in args.backends.split(","):
+            try:
+                backend = configure_jwt_backend(name, algorithm, private_key=private_pem, public_key=public_pem)
+            except ImportError as e:
+                print(f"{name:<8}{algorithm:<8}跳过: {e}")
+                continue
+
+            token = create_access_token(claims, roles=["admin"], permissions=["users:view", "users:edit"])
+            encode_rate = measure(lambda: backend.encode(claims), args.seconds)
+            decode_rate = measure(lambda: backend.decode(token), args.seconds)
+            verify_rate = measure(lambda: verify_token(token, db), args.seconds)
+            print(
+                f"{name:<8}{algorithm:<8}{encode_rate:>14,.0f}{decode_rate:>14,.0f}"
+                f"{verify_rate:>22,.0f}{1e6 / verify_rate:>12,.1f}µs"
+            )
+
+    db.close()
+
+if __name__ == "__main__":
+    main()
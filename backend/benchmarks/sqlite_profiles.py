@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+SQLite 配置基准测试
+
+对比 default（StaticPool 单连接 + 回滚日志）与 performance（WAL + PRAGMA + 每线程连接）
+两种 SQLite 配置：多个读线程按主键和分页读取用户，同时一个写线程持续写入操作日志并提交。
+输出读吞吐、读延迟分位数与写提交速率。
+
+用法:
+    python benchmarks/sqlite_profiles.py [--seconds 5] [--readers 8] [--users 5000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+_workdir = tempfile.mkdtemp(prefix="sqlite-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/app.db")
+os.environ["LOG_FILE"] = f"{_workdir}/bench.log"
+os.environ["LOG_LEVEL"] = "ERROR"
+os.environ.setdefault("BACKEND_CORS_ORIGINS", '["http://localhost"]')
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.database import (  # noqa: E402
+    Base, SQLITE_PROFILE_DEFAULT, SQLITE_PROFILE_PERFORMANCE, create_database_engine
+)
+from app.models import OperationLog, User  # noqa: E402
+
+def seed(session_factory, users: int) -> None:
+    """写入测试用户"""
+    db = session_factory()
+    try:
+        db.add_all(
+            User(
+                username=f"user{i}",
+                email=f"user{i}@example.com",
+                password_hash="x",
+                full_name=f"用户{i}"
+            )
+            for i in range(users)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def run_profile(profile: str, seconds: float, readers: int, users: int) -> dict:
+    """在独立的数据库文件上运行一种配置"""
+    engine = create_database_engine(f"sqlite:///{_workdir}/{profile}.db", sqlite_profile=profile)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(session_factory, users)
+
+    stop = threading.Event()
+    latencies = []
+    commits = [0]
+    errors = [0]
+    lock = threading.Lock()
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            db = session_factory()
+            try:
+                if random.random() < 0.8:
+                    db.query(User).filter(User.id == random.randint(1, users)).first()
+                else:
+                    db.query(User).order_by(User.id).offset(random.randint(0, users - 20)).limit(20).all()
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    def writer():
+        while not stop.is_set():
+            db = session_factory()
+            try:
+                db.add(OperationLog(action="基准测试", resource="bench", description="写入"))
+                db.commit()
+                commits[0] += 1
+            except Exception:
+                db.rollback()
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "reads_per_second": len(latencies) / seconds,
+        "read_p50_ms": statistics.median(latencies) * 1000,
+        "read_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "commits_per_second": commits[0] / seconds,
+        "errors": errors[0]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite 配置基准测试")
+    parser.add_argument("--seconds", type=float, default=5.0, help="每种配置的运行时长（秒）")
+    parser.add_argument("--readers", type=int, default=8, help="读线程数")
+    parser.add_argument("--users", type=int, default=5000, help="测试用户数")
+    args = parser.parse_args()
+
+    print(f"{'配置':<14}{'读 ops/s':>12}{'读 p50':>12}{'读 p99':>12}{'写提交/s':>12}{'错误':>8}")
+    for profile in (SQLITE_PROFILE_DEFAULT, SQLITE_PROFILE_PERFORMANCE):
+        result = run_profile(profile, args.seconds, args.readers, args.users)
+        print(
+            f"{profile:<14}{result['reads_per_second']:>12,.0f}"
+            f"{result['read_p50_ms']:>10.2f}ms{result['read_p99_ms']:>10.2f}ms"
+            f"{result['commits_per_second']:>12,.0f}{result['errors']:>8}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+重建用户全文索引
+
+索引由触发器自动维护，仅在批量导入绕过触发器、数据库从备份恢复等情况下需要手动重建：
+    python rebuild_search_index.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加当前目录到 Python 路径
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # 加载环境变量
+    load_dotenv()
+
+    from app.core.database import engine
+    from app.core.user_search import ensure_user_search_index, rebuild_user_search_index
+
+    if not ensure_user_search_index(engine):
+        print("当前数据库不支持 FTS5 trigram 全文索引，关键词搜索使用 LIKE，无需重建")
+        sys.exit(1)
+
+    with engine.begin() as connection:
+        rebuild_user_search_index(connection)
+    print("用户全文索引重建完成")
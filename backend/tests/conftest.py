@@ -0,0 +1,57 @@
+"""
+测试公共夹具
+
+导入应用之前通过环境变量指定临时数据库与日志文件，测试不会读写 data/ 下的数据库。
+"""
+import os
+import tempfile
+
+_TEST_DIR = tempfile.mkdtemp(prefix="demo-fastapi-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DIR}/app.db"
+os.environ["LOG_FILE"] = os.path.join(_TEST_DIR, "logs", "app.log")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("BACKEND_CORS_ORIGINS", '["*"]')
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")  # 测试中不做bcrypt耗时校准
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    """运行应用生命周期（建表、初始化默认数据）的测试客户端"""
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    """默认管理员的认证请求头"""
+    from app.core.config import settings
+
+    response = client.post(
+        "/api/auth/login-json",
+        json={"email": settings.DEFAULT_ADMIN_EMAIL, "password": settings.DEFAULT_ADMIN_PASSWORD}
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['data']['token']}"}
+
+
+@pytest.fixture
+def run_async(client):
+    """在应用的事件循环中执行协程函数，异步引擎的连接与应用共用"""
+    def run(async_fn, *args):
+        return client.portal.call(async_fn, *args)
+
+    return run
+
+
+@pytest.fixture
+def strict_lazy_load(monkeypatch):
+    """开启严格模式：关系属性的延迟加载直接抛出异常"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SQL_STRICT_LAZY_LOAD", True)
@@ -0,0 +1,94 @@
+"""
+认证路径不在事件循环中使用同步数据库会话
+
+令牌吊销列表、权限版本号与会话表的查询都应经由请求的异步会话（或线程池）执行，
+这里把各模块的 SessionLocal 替换为直接失败的函数，缓存与同步间隔全部过期，
+迫使请求路径实际访问数据库。
+"""
+import pytest
+
+from app.core import database, permission_claims, permission_matrix, sessions, token_revocation
+from app.core.config import settings
+from app.core.permission_claims import PERMISSION_VERSION_CACHE_KEY
+from app.core.sessions import session_store
+from app.core.token_revocation import token_revocations
+from app.models.user_session import UserSession
+from app.utils.cache import cache, principal_cache
+
+
+@pytest.fixture
+def no_sync_sessions(monkeypatch):
+    def fail():
+        raise AssertionError("请求处理中不应打开同步数据库会话")
+
+    for module in (token_revocation, permission_claims, permission_matrix, sessions):
+        monkeypatch.setattr(module, "SessionLocal", fail, raising=False)
+    return fail
+
+
+def _expire_auth_caches(monkeypatch):
+    cache.delete(PERMISSION_VERSION_CACHE_KEY)
+    principal_cache.clear()
+    monkeypatch.setattr(token_revocations, "_last_sync", 0.0)
+
+
+def test_authenticated_requests_use_async_sessions(client, no_sync_sessions, monkeypatch):
+    _expire_auth_caches(monkeypatch)
+    response = client.post(
+        "/api/auth/login-json",
+        json={"email": settings.DEFAULT_ADMIN_EMAIL, "password": settings.DEFAULT_ADMIN_PASSWORD}
+    )
+    assert response.status_code == 200, response.text
+    tokens = response.json()["data"]
+    headers = {"Authorization": f"Bearer {tokens['token']}"}
+
+    _expire_auth_caches(monkeypatch)
+    assert client.get("/api/users/suggest", params={"q": "a"}, headers=headers).status_code == 200
+
+    _expire_auth_caches(monkeypatch)
+    response = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200, response.text
+
+    # 已吊销的令牌命中布隆过滤器，确认查询同样走请求的会话
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    _expire_auth_caches(monkeypatch)
+    assert client.get("/api/users/suggest", params={"q": "a"}, headers=headers).status_code == 401
+
+
+
+def _stored_session(key):
+    db = database.SessionLocal()
+    try:
+        return db.query(UserSession).filter(UserSession.session_hash == key).first()
+    finally:
+        db.close()
+
+
+def test_persisted_sessions_batch_last_seen(client, no_sync_sessions, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TOKEN_MODE", "session")
+    monkeypatch.setattr(session_store, "persist", True)
+    monkeypatch.setattr(session_store, "touch_interval", 0)
+    _expire_auth_caches(monkeypatch)
+
+    response = client.post(
+        "/api/auth/login-json",
+        json={"email": settings.DEFAULT_ADMIN_EMAIL, "password": settings.DEFAULT_ADMIN_PASSWORD}
+    )
+    assert response.status_code == 200, response.text
+    token = response.json()["data"]["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    key = session_store._hash(token)
+    created = _stored_session(key).last_seen_at
+
+    # 校验会话只在内存中记录访问时间，由后台任务批量写入
+    assert client.get("/api/users/suggest", params={"q": "a"}, headers=headers).status_code == 200
+    assert key in session_store._pending_touches
+
+    monkeypatch.setattr(sessions, "SessionLocal", database.SessionLocal)
+    session_store.flush()
+    assert not session_store._pending_touches
+    assert _stored_session(key).last_seen_at > created
+
+    monkeypatch.setattr(sessions, "SessionLocal", no_sync_sessions)
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert _stored_session(key) is None
@@ -0,0 +1,46 @@
+"""
+客户端IP解析：只有来自可信代理的请求才采用转发头
+"""
+import pytest
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.middleware.audit_log import get_client_ip
+
+
+def _request(peer, **headers):
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/api/auth/login-json",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+        "client": (peer, 12345),
+    })
+
+
+def test_forwarded_headers_ignored_without_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", [])
+    request = _request("203.0.113.7", x_forwarded_for="1.2.3.4", x_real_ip="5.6.7.8")
+    assert get_client_ip(request) == "203.0.113.7"
+
+
+@pytest.mark.parametrize("forwarded_for, expected", [
+    ("198.51.100.1", "198.51.100.1"),
+    # 客户端自带的伪造地址在最左侧，取可信代理之前的最后一跳
+    ("1.2.3.4, 198.51.100.1", "198.51.100.1"),
+    ("198.51.100.1, 10.0.0.2", "198.51.100.1"),
+])
+def test_forwarded_for_behind_trusted_proxy(monkeypatch, forwarded_for, expected):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["10.0.0.0/8"])
+    assert get_client_ip(_request("10.0.0.1", x_forwarded_for=forwarded_for)) == expected
+
+
+def test_untrusted_peer_cannot_spoof_behind_proxy_config(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["10.0.0.0/8"])
+    request = _request("203.0.113.7", x_forwarded_for="1.2.3.4")
+    assert get_client_ip(request) == "203.0.113.7"
+
+
+def test_real_ip_behind_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["10.0.0.1"])
+    assert get_client_ip(_request("10.0.0.1", x_real_ip="198.51.100.9")) == "198.51.100.9"
@@ -0,0 +1,47 @@
+"""
+其他进程修改角色权限后，本进程的权限矩阵随全局权限版本号重新加载
+"""
+from app.core.database import SessionLocal
+from app.core.permission_claims import (
+    PERMISSION_VERSION_CACHE_KEY,
+    PERMISSION_VERSION_KEY,
+    get_permission_version,
+)
+from app.core.permission_matrix import permission_matrix
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.role_permission import RolePermission
+from app.models.system_setting import SystemSetting
+from app.utils.cache import cache
+
+
+def test_matrix_reloads_when_version_advances(client):
+    db = SessionLocal()
+    try:
+        role = db.query(Role).filter(Role.name == "user").one()
+        granted = {row.permission_id for row in db.query(RolePermission).filter(RolePermission.role_id == role.id)}
+        permission = db.query(Permission).filter(Permission.id.notin_(granted)).first()
+        version = get_permission_version(db)
+        assert permission_matrix.version == version
+        assert not permission_matrix.roles_grant_any([role.id], [permission.name])
+
+        # 模拟另一个进程：直接写库并递增版本号，本进程的矩阵未增量更新
+        db.add(RolePermission(role_id=role.id, permission_id=permission.id))
+        setting = db.query(SystemSetting).filter(SystemSetting.key == PERMISSION_VERSION_KEY).first()
+        if setting is None:
+            setting = SystemSetting(key=PERMISSION_VERSION_KEY, value=str(version))
+            db.add(setting)
+        setting.value = str(version + 1)
+        db.commit()
+        cache.delete(PERMISSION_VERSION_CACHE_KEY)
+
+        assert get_permission_version(db) == version + 1
+        assert permission_matrix.version == version + 1
+        assert permission_matrix.roles_grant_any([role.id], [permission.name])
+    finally:
+        db.query(RolePermission).filter(
+            RolePermission.role_id == role.id, RolePermission.permission_id == permission.id
+        ).delete()
+        db.commit()
+        permission_matrix.load(db, permission_matrix.version)
+        db.close()
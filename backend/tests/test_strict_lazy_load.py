@@ -0,0 +1,95 @@
+"""
+严格延迟加载模式
+
+开启 SQL_STRICT_LAZY_LOAD 后，需要发出SQL的关系属性延迟加载直接抛出异常，
+接口中的N+1查询会使测试失败。
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+
+from app.core.database import SessionLocal
+from app.models import Role, User, UserRole
+from app.services.role_management_service import RoleManagementService
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def test_lazy_relationship_load_raises(db, strict_lazy_load):
+    user = db.execute(select(User)).scalars().first()
+    with pytest.raises(InvalidRequestError):
+        user.user_roles
+
+    role = db.execute(select(Role)).scalars().first()
+    with pytest.raises(InvalidRequestError):
+        role.role_permissions
+
+
+def test_explicit_eager_load_is_allowed(db, strict_lazy_load):
+    user = db.execute(
+        select(User).options(selectinload(User.user_roles).selectinload(UserRole.role))
+    ).scalars().first()
+    assert [user_role.role.name for user_role in user.user_roles]
+
+
+def test_lazy_load_is_allowed_when_strict_mode_is_off(db, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SQL_STRICT_LAZY_LOAD", False)
+    user = db.execute(select(User)).scalars().first()
+    assert user.user_roles is not None
+
+
+def test_listeners_are_registered_without_the_app(client):
+    """只导入数据库模块（不导入 app.main）时严格模式同样生效"""
+    script = (
+        "import sys\n"
+        "from sqlalchemy import select\n"
+        "from sqlalchemy.exc import InvalidRequestError\n"
+        "from app.core.database import SessionLocal\n"
+        "from app.models import User\n"
+        "assert 'app.main' not in sys.modules\n"
+        "user = SessionLocal().execute(select(User)).scalars().first()\n"
+        "try:\n"
+        "    user.user_roles\n"
+        "except InvalidRequestError:\n"
+        "    sys.exit(0)\n"
+        "sys.exit(1)\n"
+    )
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=backend_dir,
+        env={**os.environ, "SQL_STRICT_LAZY_LOAD": "true"},
+        capture_output=True
+    )
+    assert result.returncode == 0, result.stderr.decode()
+
+
+@pytest.mark.parametrize("path", [
+    "/api/users",
+    "/api/users?pageSize=100&tags=seed,group-1",
+    "/api/users/USR-1",
+    "/api/users/facets",
+    "/api/roles",
+    "/api/roles?include=members,permissions",
+])
+def test_endpoints_pass_in_strict_mode(client, admin_headers, strict_lazy_load, path):
+    RoleManagementService._invalidate_roles_list_cache()
+
+    response = client.get(path, headers=admin_headers)
+
+    assert response.status_code == 200, response.text
+    assert int(response.headers["X-DB-Queries"]) > 0
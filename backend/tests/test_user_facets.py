@@ -0,0 +1,73 @@
+"""
+用户分面计数与角色变更
+"""
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models import Role, User
+from app.services.role_management_service import RoleManagementService
+from app.services.user_management_service import UserManagementService
+from app.utils.cache import user_count_cache
+
+
+async def _facets():
+    async with AsyncSessionLocal() as db:
+        return await UserManagementService.get_users_facets(db)
+
+
+async def _rename_role(role_id: int, name: str):
+    async with AsyncSessionLocal() as db:
+        return await RoleManagementService.update_role(db, f"ROLE-{role_id}", {"displayName": name})
+
+
+def test_role_rename_refreshes_cached_facets(run_async):
+    db = SessionLocal()
+    try:
+        role = Role(name="facet_role", description="分面计数测试角色")
+        db.add(role)
+        db.commit()
+        role_id = role.id
+    finally:
+        db.close()
+    # 直接写库不经过服务层，需手动清除计数缓存
+    user_count_cache.invalidate()
+
+    assert "facet_role" in run_async(_facets)["role"]
+
+    run_async(lambda: _rename_role(role_id, "facet_role_renamed"))
+
+    roles = run_async(_facets)["role"]
+    assert "facet_role_renamed" in roles
+    assert "facet_role" not in roles
+
+
+async def _inactive_total():
+    async with AsyncSessionLocal() as db:
+        result = await UserManagementService.get_users_list(db, status="inactive", page_size=100)
+        return result["total"]
+
+
+def test_null_is_active_counts_as_inactive_in_facets_and_list(run_async):
+    db = SessionLocal()
+    try:
+        user = User(username="null_status", email="null_status@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        # 列默认值为 True，另行写入 NULL
+        db.query(User).filter(User.id == user_id).update({User.is_active: None})
+        db.commit()
+    finally:
+        db.close()
+    user_count_cache.invalidate()
+
+    try:
+        inactive = run_async(_facets)["status"]["inactive"]
+        assert inactive >= 1
+        assert inactive == run_async(_inactive_total)
+    finally:
+        db = SessionLocal()
+        try:
+            db.query(User).filter(User.id == user_id).delete()
+            db.commit()
+        finally:
+            db.close()
+        user_count_cache.invalidate()
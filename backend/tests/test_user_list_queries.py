@@ -0,0 +1,125 @@
+"""
+用户列表的SQL语句数与游标分页
+
+列表按列投影查询用户，整页用户的角色ID、标签各用一条语句批量查询，
+语句数与每页数量无关。游标分页的结果与页码分页一致，非法游标返回400。
+"""
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import DateTime
+
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.query_stats import start_query_stats
+from app.models import Role, User, UserRole, UserTag
+from app.services import user_management_service
+from app.services.user_management_service import UserManagementService
+from app.utils.cache import user_count_cache
+from app.utils.exceptions import ValidationError
+from app.utils.pagination import encode_cursor, parse_cursor_value
+
+SEED_USERS = 150
+
+# 列表不应依赖关系属性的延迟加载
+pytestmark = pytest.mark.usefixtures("strict_lazy_load")
+
+
+@pytest.fixture(scope="module")
+def seeded_users(client):
+    """写入足够多页的用户，每个用户带一个角色和两个标签"""
+    db = SessionLocal()
+    try:
+        role = db.query(Role).filter(Role.name == "user").one()
+        users = [
+            User(
+                username=f"list_user_{index}",
+                email=f"list_user_{index}@example.com",
+                password_hash="not-a-real-hash",
+                full_name=f"List User {index}",
+                department="Engineering" if index % 2 else "Sales"
+            )
+            for index in range(SEED_USERS)
+        ]
+        db.add_all(users)
+        db.flush()
+        for user in users:
+            db.add(UserRole(user_id=user.id, role_id=role.id))
+            db.add_all([UserTag(user_id=user.id, tag="seed"), UserTag(user_id=user.id, tag=f"group-{user.id % 5}")])
+        db.commit()
+    finally:
+        db.close()
+    user_count_cache.invalidate()
+    return SEED_USERS
+
+
+async def _count_list_statements(**kwargs):
+    """执行一次 get_users_list，返回执行的语句数与结果"""
+    stats = start_query_stats()
+    async with AsyncSessionLocal() as db:
+        result = await UserManagementService.get_users_list(db, **kwargs)
+    return stats.count, result
+
+
+@pytest.mark.parametrize("filters", [{}, {"tags": "seed"}, {"keyword": "list_user"}])
+def test_statement_count_does_not_depend_on_page_size(run_async, seeded_users, filters):
+    counts = {}
+    for page_size in (10, 100):
+        user_count_cache.invalidate()
+        count, result = run_async(lambda: _count_list_statements(page_size=page_size, **filters))
+        assert len(result["items"]) == page_size
+        assert all(item["tags"] for item in result["items"] if item["email"] != "admin@example.com")
+        counts[page_size] = count
+
+    # 用户、总数、角色ID、标签各一条
+    assert counts == {10: 4, 100: 4}
+
+
+def test_cached_total_skips_count_statement(run_async, seeded_users):
+    user_count_cache.invalidate()
+    first, _ = run_async(lambda: _count_list_statements(page_size=100))
+    second, result = run_async(lambda: _count_list_statements(page_size=100))
+
+    assert result["total"] >= seeded_users
+    assert (first, second) == (4, 3)
+
+
+async def _list(**kwargs):
+    async with AsyncSessionLocal() as db:
+        return await UserManagementService.get_users_list(db, **kwargs)
+
+
+@pytest.mark.parametrize("row_values", [True, False])
+@pytest.mark.parametrize("field, order", [("createdAt", "descend"), ("lastLogin", "ascend"), ("lastLogin", "descend")])
+def test_cursor_pages_match_offset_pages(run_async, seeded_users, monkeypatch, row_values, field, order):
+    monkeypatch.setattr(user_management_service, "supports_row_values", lambda dialect: row_values)
+    sorter = json.dumps({"field": field, "order": order})
+
+    expected = [item["id"] for item in run_async(lambda: _list(page_size=100, sorter=sorter))["items"]]
+    expected += [item["id"] for item in run_async(lambda: _list(page=2, page_size=100, sorter=sorter))["items"]]
+
+    seen, cursor = [], None
+    while True:
+        result = run_async(lambda: _list(page_size=40, sorter=sorter, cursor=cursor))
+        seen += [item["id"] for item in result["items"]]
+        cursor = result["nextCursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
+    # 从最后一页向前翻回第一页
+    back = run_async(lambda: _list(page_size=40, sorter=sorter, cursor=result["prevCursor"]))
+    assert [item["id"] for item in back["items"]] == seen[-40 - len(result["items"]):-len(result["items"])]
+
+
+@pytest.mark.parametrize("value, tiebreaker", [("not-a-date", 1), ({"a": 1}, 1), ("2024-01-01", "1"), (True, 1)])
+def test_cursor_with_invalid_values_is_rejected(client, value, tiebreaker):
+    cursor = encode_cursor({"f": "createdAt", "o": "ascend", "v": value, "id": tiebreaker, "d": "next"})
+    response = client.get("/api/users", params={"cursor": cursor, "sorter": '{"field": "createdAt", "order": "ascend"}'})
+    assert response.status_code == 400, response.text
+
+
+def test_parse_cursor_value_restores_datetimes():
+    assert parse_cursor_value("2024-01-02T03:04:05", DateTime()) == datetime(2024, 1, 2, 3, 4, 5)
+    with pytest.raises(ValidationError):
+        parse_cursor_value("yesterday", DateTime())
@@ -28,5 +28,11 @@ export const authApi = {
       return mockApi.auth.requestPasswordReset(payload)
     }
     return apiRequest.post('auth/forgot-password', payload)
+  },
+  logout(payload) {
+    if (isMockEnabled) {
+      return mockApi.auth.logout(payload)
+    }
+    return apiRequest.post('auth/logout', payload)
   }
 }
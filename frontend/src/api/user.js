@@ -8,7 +8,11 @@ export const userApi = {
       return mockApi.users.fetchUsers(params)
     }
     console.log("Fetching users from API with params:", params)
-    return apiRequest.get("users", { params })
+    // 后端的多值筛选（部门、标签）以逗号分隔
+    const query = Object.fromEntries(
+      Object.entries(params).map(([key, value]) => [key, Array.isArray(value) ? value.join(",") : value])
+    )
+    return apiRequest.get("users", { params: query })
   },
   fetchUser(id) {
     if (isMockEnabled) {
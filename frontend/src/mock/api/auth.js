@@ -63,5 +63,6 @@ export const authMockApi = {
     }
 
     return simulateResponse({ success: true, email })
-  }
+  },
+  logout: async () => simulateResponse({ success: true })
 }
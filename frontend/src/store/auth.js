@@ -199,6 +199,18 @@ export const useAuthStore = defineStore("auth", {
       }
     },
 
+    async signOut() {
+      // 通知后端吊销令牌，失败时仍清除本地会话
+      if (this.token) {
+        try {
+          await authApi.logout({ refresh_token: this.refreshToken })
+        } catch (error) {
+          logger.warn("Token revocation failed", error)
+        }
+      }
+      this.logout()
+    },
+
     logout() {
       this.token = null
       this.refreshToken = null